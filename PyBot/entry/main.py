@@ -1,39 +1,122 @@
 import asyncio
-import os
 import re
 import sys
 import traceback
 from collections import deque, namedtuple
-from operator import itemgetter
-from typing import Optional, Union, List, Tuple, Deque, Dict
+from functools import partial
+from io import BytesIO
+from typing import Optional, Union, List, Tuple, Deque, Callable
 
 import discord
-import requests
-from discord import Role, Guild, Embed
+from discord import Role, Guild
 from discord.ext import commands
 from discord.ext.commands import Bot, Context, CommandNotFound
 
-from PyBot.constants.emojis import TROPHY, CROWN
-from core_classes.builtins import UNKNOWN_PLAYER
-from core_classes.player import Player
-from core_classes.skill import Skill
-from helpers.str_helper import equals_ignore_case, truncate
-from slapp_py.slapipes import initialise_slapp, query_slapp, process_slapp, slapp_describe
+from PyBot.helpers.autoseed_helper import AutoseedJob, SeededTeam, get_snapshot_version, load_autoseed_results, \
+    save_autoseed_results
+from PyBot.helpers.embed_helper import paginate_embed
+from PyBot.helpers.image_helper import fetch_image, get_or_make_jpeg, ImageFetchError
+from PyBot.helpers.predict_helper import predict_message
+from PyBot.helpers.role_count_helper import RoleCounter
+from PyBot.helpers.schedule_helper import RateLimiter, FairDispatcher, SlappThrottled, SLAPP_DISPATCH_TIMEOUT_SECONDS
+from PyBot.helpers.send_helper import ChannelSender
+from PyBot.helpers.verify_helper import VerifyJob
+from helpers.str_helper import equals_ignore_case
+from slapp_py.slapipes import initialise_slapp, query_slapp_nowait, process_slapp_off_loop, slapp_describe_nowait, \
+    get_cached_describe, cache_describe
 from slapp_py.slapp_response_object import SlappResponseObject
 from slapp_py.weapons import get_random_weapon
 from tokens import BOT_TOKEN, CLIENT_ID, OWNER_ID
 
 COMMAND_PREFIX = '~'
-IMAGE_FORMATS = ["image/png", "image/jpeg", "image/jpg"]
-SlappQueueItem = namedtuple('SlappQueueItem', ('Context', 'str'))
-slapp_ctx_queue: Deque[SlappQueueItem] = deque()
+JOB_COMMAND_COST = 5
+"""The rate limit cost of commands that look up a whole tournament, relative to a single Slapp query."""
+SlappQueueItem = namedtuple('SlappQueueItem', ('Context', 'str', 'Future'), defaults=(None,))
+"""A pending Slapp query: the Context to reply to, what the query is for, and optionally a Future for the response."""
+SlappRequest = namedtuple('SlappRequest', ('Item', 'Write'))
+"""A Slapp query waiting its turn: the SlappQueueItem for its response, and the function that writes it to Slapp."""
+slapp_ctx_queue: Deque[SlappRequest] = deque()
+"""The Slapp queries that have been written, in order, as Slapp answers them in order."""
+sender = ChannelSender()
+rate_limiter = RateLimiter()
+
+
+def _dispatch_slapp(request: SlappRequest) -> bool:
+    """Write the request to Slapp. The queue item is appended in the same step so that responses stay matched."""
+    future = request.Item.Future
+    if future is not None and future.done():
+        # Abandoned while it waited, e.g. the lookup timed out.
+        return False
+    slapp_ctx_queue.append(request)
+    request.Write()
+    return True
+
+
+def _expire_slapp(request: SlappRequest):
+    """Give up on a query that Slapp hasn't answered, so that it doesn't hold its place in the queue."""
+    # If the response does come back late, it's matched to the next query, as before the deadline.
+    print(f'Slapp did not answer {request.Item.str} in time, giving up on it.')
+    try:
+        slapp_ctx_queue.remove(request)
+    except ValueError:
+        pass
+
+    ctx, _, future = request.Item
+    if future is not None:
+        if not future.done():
+            future.set_result(('Timed out', None))
+    elif ctx is not None:
+        asyncio.ensure_future(ctx.send("Slapp didn't answer in time 😔"))
+
+
+slapp_dispatcher: FairDispatcher[SlappRequest] = FairDispatcher(_dispatch_slapp,
+                                                                timeout_seconds=SLAPP_DISPATCH_TIMEOUT_SECONDS,
+                                                                on_timeout=_expire_slapp)
+
+
+def fair_key(ctx: Context) -> int:
+    """The key that Slapp queries take turns by: the guild, or the user in DMs."""
+    return ctx.guild.id if ctx.guild else ctx.author.id
+
+
+def submit_slapp(ctx: Context, item: SlappQueueItem, write: Callable[[], None]) -> SlappRequest:
+    """Queue a Slapp query for its fair turn. write is called to send it, e.g. partial(query_slapp_nowait, query)."""
+    request = SlappRequest(item, write)
+    slapp_dispatcher.submit(fair_key(ctx), request)
+    return request
+
+
+async def await_slapp(request: SlappRequest) -> Tuple[str, dict]:
+    """Wait for the (success message, response) of a submitted query with a Future."""
+    try:
+        return await request.Item.Future
+    finally:
+        if request.Item.Future.cancelled():
+            # e.g. the lookup timed out, so free its slot rather than waiting for its response.
+            # Its queue entry stays until the response comes back or its deadline passes, to keep responses matched.
+            slapp_dispatcher.release(request)
+
+
+def slapp_rate_limit(cost: float = 1):
+    """Command check that takes the cost from the user's and guild's token buckets, or raises SlappThrottled."""
+    def predicate(ctx: Context) -> bool:
+        if ctx.command is not None and ctx.command.name == 'help':
+            # The help command checks if each command can run, which shouldn't cost anything.
+            return True
+        rate_limiter.acquire(ctx.author.id, ctx.guild.id if ctx.guild else None, cost)
+        return True
+    return commands.check(predicate)
+
 
 if __name__ == '__main__':
     intents = discord.Intents.default()
     intents.members = True  # Subscribe to the privileged members intent for roles.
     intents.presences = False
     intents.typing = False
-    bot: Bot = commands.Bot(command_prefix=COMMAND_PREFIX, intents=intents, owner_id=OWNER_ID)
+    # Members aren't cached; the role counts that ~members needs are kept by role_counter instead.
+    bot: Bot = commands.Bot(command_prefix=COMMAND_PREFIX, intents=intents, owner_id=OWNER_ID,
+                            member_cache_flags=discord.MemberCacheFlags.none(), chunk_guilds_at_startup=False)
+    role_counter = RoleCounter()
 
     @bot.command(
         name='jpg',
@@ -42,39 +125,21 @@ if __name__ == '__main__':
     )
     async def jpg(ctx: Context, quality_or_url: Union[str, int] = 10, quality: int = 10):
         try:
-            import tempfile
-            (handle_int, filename) = tempfile.mkstemp('.jpg')
             if isinstance(quality_or_url, str) and re.match(r"[-+]?\d+$", quality_or_url) is None:
-                with open(filename, 'wb') as handle:
-                    r = requests.head(quality_or_url)
-                    if r.headers["content-type"] not in IMAGE_FORMATS:
-                        await ctx.send(f"Something went wrong 😔 (not an image)")
-                        return
-
-                    r = requests.get(quality_or_url, stream=True)
-                    if r.status_code != 200:
-                        await ctx.send(f"Something went wrong 😔 {r.__str__()}")
-                        return
-
-                    for block in r.iter_content(1024):
-                        if not block:
-                            break
-                        handle.write(block)
-                print(f'Saved url {quality_or_url} temp to {filename}')
+                try:
+                    jpeg_bytes = await get_or_make_jpeg(quality_or_url, quality,
+                                                        lambda: fetch_image(quality_or_url))
+                except ImageFetchError as e:
+                    await ctx.send(f"Something went wrong 😔 ({e})")
+                    return
             else:
                 quality = int(quality_or_url)
-                await ctx.author.avatar_url.save(filename)
-                print(f'Saved {ctx.author} avatar at url {ctx.author.avatar_url} temp to {filename}')
-
-            from PIL import Image
-            im = Image.open(filename)
-            im = im.convert("RGB")
-            im.save(filename, format='JPEG', quality=quality)
+                # The avatar hash changes whenever the avatar does. Default avatars have no hash.
+                avatar_key = (ctx.author.id, ctx.author.avatar or ctx.author.avatar_url.__str__())
+                jpeg_bytes = await get_or_make_jpeg(avatar_key, quality, ctx.author.avatar_url.read)
 
-            file = discord.File(fp=filename)
+            file = discord.File(fp=BytesIO(jpeg_bytes), filename='jpg.jpg')
             await ctx.send(f"Here you go! (Quality: {quality})", file=file)
-            os.close(handle_int)
-            os.remove(filename)
         except Exception as e:
             await ctx.send(f"Something went wrong 😔 {e}")
 
@@ -118,31 +183,65 @@ if __name__ == '__main__':
     async def members(ctx: Context, role: Optional[Role]):
         guild: Optional[Guild] = ctx.guild
         if guild:
-            await ctx.guild.fetch_roles()
-            ctx.guild.fetch_members(limit=None)
             if role:
-                count = sum(1 for user in guild.members if role in user.roles)
+                # Every member has the @everyone role, so it's not counted by role_counter.
+                count = guild.member_count if role.is_default() else await role_counter.count(guild, role.id)
                 await ctx.send(f"{count}/{guild.member_count} users are in this server with the role {role.name}!")
             else:
                 await ctx.send(f"{guild.member_count} users are in the server!")
         else:
             await ctx.send("Hmm... we're not in a server! 😅")
 
+    @bot.event
+    async def on_socket_response(msg: dict):
+        role_counter.on_socket_response(msg)
+
+
+    async def download_tournament(ctx: Context, tourney_id: str, force: bool = False) -> List[dict]:
+        """Download the tournament's teams from Battlefy without blocking the bot, showing progress in a message."""
+        from misc.download_from_battlefy_result import download_from_battlefy_async
+        progress_message = await ctx.send(f'Downloading the tournament from Battlefy... (id: {tourney_id})')
+
+        async def progress(text: str):
+            await progress_message.edit(content=text)
+
+        tournaments = await download_from_battlefy_async(tourney_id, force=force, progress=progress)
+        tournament = (tournaments[0] if len(tournaments) == 1 else tournaments) or []
+        await progress_message.edit(content=f'Downloaded {len(tournament)} teams from Battlefy. (id: {tourney_id})')
+        return tournament
+
+    async def seed_tournament(ctx: Context,
+                              tourney_id: str,
+                              tournament: List[dict]) -> Tuple[AutoseedJob, List[SeededTeam]]:
+        """Run an AutoseedJob over the tournament with a progress message, reusing and then saving its results."""
+        progress_message = await ctx.send(f'Looking up the players of {len(tournament)} teams...')
+
+        async def progress(done: int, total: int):
+            await progress_message.edit(content=f'Looked up {done}/{total} players...')
+
+        loop = asyncio.get_event_loop()
+        snapshot_version = get_snapshot_version()
+        known_players = await loop.run_in_executor(None, load_autoseed_results, tourney_id, snapshot_version)
+
+        job = AutoseedJob(tournament, partial(slapp_lookup, ctx), progress, known_players=known_players)
+        seeded = await job.run()
+        await loop.run_in_executor(None, save_autoseed_results, tourney_id, snapshot_version, job.players)
+        if job.reused:
+            await progress_message.edit(content=f'Looked up {job.looked_up} players, '
+                                                f'and {job.reused} were unchanged since the last autoseed.')
+        return job, seeded
 
     @bot.command(
         name='autoseed',
         description="Auto seed the teams that have signed up to the tourney",
         help=f'{COMMAND_PREFIX}autoseed <tourney_id>',
         pass_ctx=True)
+    @slapp_rate_limit(JOB_COMMAND_COST)
     async def autoseed(ctx: Context, tourney_id: Optional[str]):
         if not tourney_id:
             tourney_id = '6019b6d0ce01411daff6bca6'
 
-        from misc.download_from_battlefy_result import download_from_battlefy
-        tournament = list(download_from_battlefy(tourney_id, force=True))
-        if isinstance(tournament, list) and len(tournament) == 1:
-            tournament = tournament[0]
-
+        tournament = await download_tournament(ctx, tourney_id, force=True)
         if len(tournament) == 0:
             await ctx.send(f"I couldn't download the latest tournament data 😔 (id: {tourney_id})")
             return
@@ -151,58 +250,67 @@ if __name__ == '__main__':
             await ctx.send(f"There are no teams in this tournament 😔 (id: {tourney_id})")
             return
 
-        verification_message = ''
-        slapp_ctx_queue.append(SlappQueueItem(None, 'autoseed_start'))
+        job, seeded = await seed_tournament(ctx, tourney_id, tournament)
+        if job.problems:
+            for problem in job.problems:
+                sender.send(ctx, problem, merge=True)
 
-        for team in tournament:
-            name = team.get('name', None)
-            team_id = team.get('persistentTeamID', None)
-
-            if not name or not team_id:
-                continue
+        if not seeded:
+            sender.send(ctx, "Err... I didn't get any teams back from Slapp.")
+            return
 
-            players = team.get('players', None)
-            if not players:
-                verification_message += f'The team {name} ({team_id}) has no players!\n'
-                continue
+        message = ''
+        lines: List[str] = ["Here's how I'd order the teams and their players from best-to-worst, and assuming each team puts its best 4 players on:\n```"]
+        lines.extend(AutoseedJob.format_lines(seeded))
 
-            ignored_players = [truncate(player.get("inGameName", "(unknown player)"), 25, '…')
-                               for player in players if not player.get('persistentPlayerID')]
+        for line in lines:
+            if len(message) + len(line) > 1996:
+                sender.send(ctx, message + "\n```")
+                message = '```\n'
 
-            players = [player for player in players if player.get('persistentPlayerID')]
-            if len(players) < 4:
-                verification_message += f"Ignoring the player(s) from team {name} ({team_id}) as they don't have a persistent id: [{', '.join(ignored_players)}]\n"
-                verification_message += f"The team {name} ({team_id}) only has {len(players)} players, not calculating.\n"
-                continue
+            message += line + '\n'
 
-            for player in players:
-                player_slug = player['persistentPlayerID']  # We've already verified this field is good
-                slapp_ctx_queue.append(SlappQueueItem(None, 'autoseed:' + name))
-                await query_slapp(player_slug)
+        if message:
+            sender.send(ctx, message + "\n```")
 
-        # Finish off the autoseed list
-        slapp_ctx_queue.append(SlappQueueItem(ctx, 'autoseed_end'))
+    @bot.command(
+        name='matrix',
+        description="Find the most lopsided pairings between the teams that have signed up to the tourney",
+        aliases=['pairings'],
+        help=f'{COMMAND_PREFIX}matrix <tourney_id>',
+        pass_ctx=True)
+    @slapp_rate_limit(JOB_COMMAND_COST)
+    async def matrix(ctx: Context, tourney_id: Optional[str]):
+        from misc.tournament_quality import quality_matrix_pairings, worst_pairings, format_pairing
+        if not tourney_id:
+            tourney_id = '6019b6d0ce01411daff6bca6'
 
-        if verification_message:
-            await ctx.send(verification_message)
+        tournament = await download_tournament(ctx, tourney_id, force=True)
+        if not any(team.get('players', None) for team in tournament):
+            await ctx.send(f"There are no teams in this tournament 😔 (id: {tourney_id})")
+            return
 
-        # Finished in handle_autoseed
+        _, seeded = await seed_tournament(ctx, tourney_id, tournament)
+        pairings = quality_matrix_pairings([team.name for team in seeded], [team.skills for team in seeded])
+        if not pairings:
+            await ctx.send(f"I need at least two teams to pair up 😔 (id: {tourney_id})")
+            return
 
+        lines = [format_pairing(pairing) for pairing in worst_pairings(pairings)]
+        sender.send(ctx, f"Of the {len(pairings)} pairings between {len(seeded)} teams, the most lopsided are:\n"
+                         f"```\n" + '\n'.join(lines) + "\n```")
 
     @bot.command(
         name='verify',
         description="Verify a signed-up team.",
         help=f'{COMMAND_PREFIX}verify <team_slug>',
         pass_ctx=True)
+    @slapp_rate_limit(JOB_COMMAND_COST)
     async def verify(ctx: Context, team_slug_or_confirmation: Optional[str], low_ink_id: Optional[str]):
         if not low_ink_id:
             low_ink_id = '6019b6d0ce01411daff6bca6'
 
-        from misc.download_from_battlefy_result import download_from_battlefy
-        tournament = list(download_from_battlefy(low_ink_id))
-        if isinstance(tournament, list) and len(tournament) == 1:
-            tournament = tournament[0]
-
+        tournament = await download_tournament(ctx, low_ink_id)
         if len(tournament) == 0:
             await ctx.send(f"I couldn't download the latest tournament data 😔 (id: {low_ink_id})")
             return
@@ -215,7 +323,16 @@ if __name__ == '__main__':
         verification_message: str = ""
 
         if do_all:
-            verification_message: str = "I'm working on it, come back later :) - Slate"
+            progress_message = await ctx.send(f'Verifying the players of {len(tournament)} teams...')
+
+            async def progress(done: int, total: int):
+                await progress_message.edit(content=f'Verified {done}/{total} players...')
+
+            verified = await VerifyJob(tournament, partial(slapp_lookup, ctx), progress).run()
+            summary, lines = VerifyJob.format_report(verified)
+            sender.send(ctx, summary, merge=True)
+            for line in lines:
+                sender.send(ctx, line, merge=True)
         else:
             team_slug = team_slug_or_confirmation
             for team in tournament:
@@ -230,7 +347,7 @@ if __name__ == '__main__':
                     if not players:
                         verification_message += f'The team {name} ({team_id}) has no players!\n'
                         continue
-                    await ctx.send(content=f'Checking team: {name} ({team_id})')
+                    sender.send(ctx, f'Checking team: {name} ({team_id})', merge=True)
 
                     for player in players:
                         player_slug = player['userSlug'] if 'userSlug' in player else None
@@ -238,13 +355,12 @@ if __name__ == '__main__':
                             verification_message += f'The team {name} ({team_id}) has a player with no slug!\n'
                             continue
                         else:
-                            slapp_ctx_queue.append(SlappQueueItem(ctx, 'verify'))
-                            await query_slapp(player_slug)
+                            submit_slapp(ctx, SlappQueueItem(ctx, 'verify'), partial(query_slapp_nowait, player_slug))
                 else:
                     continue
 
         if verification_message:
-            await ctx.send(verification_message)
+            sender.send(ctx, verification_message, merge=True)
 
     @bot.command(
         name='Slapp',
@@ -253,10 +369,10 @@ if __name__ == '__main__':
         aliases=['slapp', 'splattag', 'search'],
         help=f'{COMMAND_PREFIX}search <query>',
         pass_ctx=True)
+    @slapp_rate_limit()
     async def slapp(ctx: Context, *, query):
         print('slapp called with query ' + query)
-        slapp_ctx_queue.append(SlappQueueItem(ctx, 'slapp'))
-        await query_slapp(query)
+        submit_slapp(ctx, SlappQueueItem(ctx, 'slapp'), partial(query_slapp_nowait, query))
 
 
     @bot.command(
@@ -266,10 +382,10 @@ if __name__ == '__main__':
         aliases=['full', 'describe'],
         help=f'{COMMAND_PREFIX}full <slapp_id>',
         pass_ctx=True)
+    @slapp_rate_limit()
     async def full(ctx: Context, slapp_id: str):
         print('full called with query ' + slapp_id)
-        slapp_ctx_queue.append(SlappQueueItem(ctx, 'full'))
-        await slapp_describe(slapp_id)
+        submit_slapp(ctx, SlappQueueItem(ctx, 'full'), partial(slapp_describe_nowait, slapp_id))
 
 
     @bot.command(
@@ -279,18 +395,43 @@ if __name__ == '__main__':
         aliases=['fight', 'predict'],
         help=f'{COMMAND_PREFIX}predict <slapp_id_1> <slapp_id_2>',
         pass_ctx=True)
+    @slapp_rate_limit()
     async def predict(ctx: Context, slapp_id_team_1: str, slapp_id_team_2: str):
         print(f'predict called with teams {slapp_id_team_1=} {slapp_id_team_2=}')
-        slapp_ctx_queue.append(SlappQueueItem(ctx, 'predict_1'))
-        await slapp_describe(slapp_id_team_1)
-        slapp_ctx_queue.append(SlappQueueItem(ctx, 'predict_2'))
-        await slapp_describe(slapp_id_team_2)
-        # This comes back in the receive_slapp_response -> handle_predict
+        # Both describes are written to Slapp before either response is awaited.
+        (success_1, response_1), (success_2, response_2) = \
+            await asyncio.gather(slapp_describe_lookup(ctx, slapp_id_team_1),
+                                 slapp_describe_lookup(ctx, slapp_id_team_2))
+
+        for success_message, response in ((success_1, response_1), (success_2, response_2)):
+            if success_message != "OK":
+                await send_slapp(ctx=ctx, success_message=success_message, response=response)
+                return
+
+        await ctx.send(predict_message(SlappResponseObject(response_1), SlappResponseObject(response_2)))
+
+    @bot.command(
+        name='throttles',
+        description="Show how many Slapp commands were throttled, and how Slapp queries are queued.",
+        hidden=True,
+        pass_ctx=True)
+    @commands.is_owner()
+    async def throttles(ctx: Context):
+        top = ', '.join(f'{user_id}: {count}' for user_id, count in rate_limiter.throttled_users.most_common(5))
+        await ctx.send(f"Allowed {rate_limiter.allowed} Slapp commands, throttled {rate_limiter.throttled['user']} "
+                       f"by user and {rate_limiter.throttled['guild']} by guild. Most throttled users: [{top}]\n"
+                       f"Dispatched {slapp_dispatcher.dispatched} Slapp queries. {slapp_dispatcher.in_flight} in flight, "
+                       f"{slapp_dispatcher.waiting} waiting (at most {slapp_dispatcher.max_waiting}), "
+                       f"{slapp_dispatcher.timed_out} timed out.")
 
     @bot.event
     async def on_command_error(ctx, error):
         if isinstance(error, CommandNotFound):
             return
+        if isinstance(error, SlappThrottled):
+            print(f'Throttled {ctx.author.id=} in {fair_key(ctx)=}: {error}')
+            await ctx.send(f"Slow down! ⏳ {error}")
+            return
         raise error
 
     @bot.event
@@ -318,7 +459,7 @@ if __name__ == '__main__':
     async def send_slapp(ctx: Context, success_message: str, response: dict):
         if success_message == "OK":
             try:
-                builder, colour = process_slapp(response)
+                builder, colour = await process_slapp_off_loop(response)
             except Exception as e:
                 await ctx.send(content=f'Something went wrong processing the result from Slapp. Blame Slate. 😒🤔 '
                                        f'({e.__str__()})')
@@ -326,34 +467,7 @@ if __name__ == '__main__':
                 return
 
             try:
-                removed_fields: List[dict] = []
-                message = 1
-                # Only send 10 messages tops
-                while message <= 10:
-                    # While the message is more than the allowed 6000, or
-                    # The message has more than 20 fields, or
-                    # The removed fields has one only (the footer cannot be alone)
-                    while builder.__len__() > 6000 or len(builder.fields) > 20 or len(removed_fields) == 1:
-                        index = len(builder.fields) - 1
-                        removed: dict = builder._fields[index]
-                        builder.remove_field(index)
-                        removed_fields.append(removed)
-
-                    if builder:
-                        await ctx.send(embed=builder)
-
-                    if len(removed_fields):
-                        message += 1
-                        removed_fields.reverse()
-                        builder = Embed(title=f'Page {message}', colour=colour, description='')
-                        for field in removed_fields:
-                            try:
-                                builder._fields.append(field)
-                            except AttributeError:
-                                builder._fields = [field]
-                        removed_fields.clear()
-                    else:
-                        break
+                await sender.send_pages(ctx, paginate_embed(builder))
 
             except Exception as e:
                 await ctx.send(content=f'Too many results, sorry 😔 ({e.__str__()})')
@@ -363,175 +477,41 @@ if __name__ == '__main__':
             await ctx.send(content=f'Unexpected error from Slapp 🤔: {success_message}')
 
 
-    global_handle_autoseed_list: Optional[Dict[str, List[dict]]] = dict()
-
-    async def handle_autoseed(ctx: Optional[Context], description: str, response: Optional[dict]):
-        global global_handle_autoseed_list
-
-        if description.startswith("autoseed_start"):
-            global_handle_autoseed_list.clear()
-        elif not description.startswith("autoseed_end"):
-            team_name = description.rpartition(':')[2]  # take the right side of the colon
-            if global_handle_autoseed_list.get(team_name):
-                global_handle_autoseed_list[team_name].append(response)
-            else:
-                global_handle_autoseed_list[team_name] = [response]
-        else:
-            # End, do the thing
-            message = ''
-
-            # Team name, list of players, clout, confidence, emoji str
-            teams_by_clout: List[Tuple[str, List[str], int, int, str]] = []
-
-            if global_handle_autoseed_list:
-                for team_name in global_handle_autoseed_list:
-                    team_players = []
-                    team_awards = []
-                    for player_response in global_handle_autoseed_list[team_name]:
-                        r = SlappResponseObject(player_response)
-
-                        if r.matched_players_len == 0:
-                            p = Player(names=[r.query or UNKNOWN_PLAYER], sources=r.sources.keys())
-                            pass
-                        elif r.matched_players_len > 1:
-                            p = Player(names=[r.query or UNKNOWN_PLAYER], sources=r.sources.keys())
-                            message += f"Too many matches for player {r.query} 😔 " \
-                                       f"({r.matched_players_len=})\n"
-                        else:
-                            p = r.matched_players[0]
-
-                        team_players.append(p)
-                        team_awards.append(r.get_first_placements(p))
-
-                    player_skills = [player.skill for player in team_players]
-                    player_skills.sort(reverse=True)
-                    awards = TROPHY * len({award for award_line in team_awards for award in award_line})
-                    awards += CROWN * len([player for player in team_players if player.top500])
-                    (_, _), (max_clout, max_confidence) = Skill.team_clout(player_skills)
-                    teams_by_clout.append(
-                        (team_name,
-                         [truncate(player.name.value, 25, '…') for player in team_players],
-                         max_clout,
-                         max_confidence,
-                         awards)
-                    )
-                teams_by_clout.sort(key=itemgetter(2), reverse=True)
-            else:
-                message = "Err... I didn't get any teams back from Slapp."
-
-            if message:
-                await ctx.send(message)
-
-            message = ''
-            lines: List[str] = ["Here's how I'd order the teams and their players from best-to-worst, and assuming each team puts its best 4 players on:\n```"]
-            for line in [f"{truncate(tup[0], 50, '…')} (Clout: {tup[2]} with {tup[3]}% confidence) [{', '.join(tup[1])}] {tup[4]}" for tup in teams_by_clout]:
-                lines.append(line)
-
-            for line in lines:
-                if len(message) + len(line) > 1996:
-                    await ctx.send(message + "\n```")
-                    message = '```\n'
-
-                message += line + '\n'
-
-            if message:
-                await ctx.send(message + "\n```")
-
-    global_handle_predict_team_1: Optional[dict] = None
-
-    async def handle_predict(ctx: Context, description: str, response: dict):
-        global global_handle_predict_team_1
-        is_part_2 = description == "predict_2"
-        if not is_part_2:
-            global_handle_predict_team_1 = response
-        else:
-            response_1 = SlappResponseObject(global_handle_predict_team_1)
-            response_2 = SlappResponseObject(response)
-
-            if response_1.matched_players_len == 1 and response_2.matched_players_len == 1:
-                matching_mode = 'players'
-            elif response_1.matched_teams_len == 1 and response_2.matched_teams_len == 1:
-                matching_mode = 'teams'
-            else:
-                await ctx.send(content=f"I didn't get the right number of players/teams back 😔 "
-                                       f"({response_1.matched_players_len=}/{response_1.matched_teams_len=}, "
-                                       f"{response_2.matched_players_len=}/{response_2.matched_teams_len=})")
-                return
-
-            message = ''
-            if matching_mode == 'teams':
-                team_1 = response_1.matched_teams[0]
-                team_1_skills = response_1.get_team_skills(team_1.guid).values()
-                if team_1_skills:
-                    (_, _), (max_clout_1, max_conf_1) = Skill.team_clout(team_1_skills)
-                    message += Skill.make_message_clout(max_clout_1, max_conf_1, truncate(team_1.name.value, 25, "…")) + '\n'
-
-                team_2 = response_2.matched_teams[0]
-                team_2_skills = response_1.get_team_skills(team_2.guid).values()
-                if team_2_skills:
-                    (_, _), (max_clout_2, max_conf_2) = Skill.team_clout(team_2_skills)
-                    message += Skill.make_message_clout(max_clout_2, max_conf_2, truncate(team_2.name.value, 25, "…")) + '\n'
-
-                if team_1_skills and team_2_skills:
-                    favouring_team_1, favouring_team_2 = Skill.calculate_quality_of_game_teams(team_1_skills, team_2_skills)
-                    if max_conf_1 > 2 and max_conf_2 > 2:
-                        if favouring_team_1 != favouring_team_2:
-                            message += "Hmm, it'll depend on who's playing, but... "
-
-                        message += Skill.make_message_fairness(favouring_team_1)
-                else:
-                    message += "Hmm, I don't have any skill information to make a good guess on the outcome."
-
-            elif matching_mode == 'players':
-                p1 = response_1.matched_players[0]
-                message += Skill.make_message_clout(p1.skill.clout, p1.skill.confidence, truncate(p1.name.value, 25, "…")) + '\n'
-                p2 = response_2.matched_players[0]
-                message += Skill.make_message_clout(p2.skill.clout, p2.skill.confidence, truncate(p2.name.value, 25, "…")) + '\n'
-                quality = Skill.calculate_quality_of_game_players(p1.skill, p2.skill)
-                message += Skill.make_message_fairness(quality)
-            else:
-                message += f"WTF IS {matching_mode}?!"
+    async def slapp_lookup(ctx: Context, query: str) -> Tuple[str, dict]:
+        """Query Slapp on behalf of the ctx and wait for its (success message, response),
+        rather than having it sent to a channel."""
+        future = asyncio.get_event_loop().create_future()
+        return await await_slapp(submit_slapp(ctx, SlappQueueItem(None, 'lookup', future),
+                                              partial(query_slapp_nowait, query)))
 
-            await ctx.send(message)
+    async def slapp_describe_lookup(ctx: Context, slapp_id: str) -> Tuple[str, dict]:
+        """Describe the slapp id and wait for its (success message, response), using the describe cache."""
+        response = get_cached_describe(slapp_id)
+        if response is not None:
+            return "OK", response
 
+        future = asyncio.get_event_loop().create_future()
+        success_message, response = await await_slapp(submit_slapp(ctx, SlappQueueItem(None, 'describe', future),
+                                                                   partial(slapp_describe_nowait, slapp_id)))
+        if success_message == "OK" and response:
+            cache_describe(slapp_id, response)
+        return success_message, response
 
     async def receive_slapp_response(success_message: str, response: dict):
         if len(slapp_ctx_queue) == 0:
             print(f"receive_slapp_response but queue is empty. Discarding result: {success_message=}, {response=}")
         else:
-            ctx, description = slapp_ctx_queue.popleft()
-            if description.startswith('predict_'):
-                if success_message != "OK":
-                    await send_slapp(ctx=ctx,
-                                     success_message=success_message,
-                                     response=response)
-                else:
-                    await handle_predict(ctx, description, response)
-            elif description.startswith('autoseed'):
-                if success_message != "OK":
-                    await send_slapp(ctx=ctx,
-                                     success_message=success_message,
-                                     response=response)
-
-                # If the start, send on and read again.
-                if description.startswith("autoseed_start"):
-                    await handle_autoseed(None, description, None)
-                    ctx, description = slapp_ctx_queue.popleft()
-
-                await handle_autoseed(ctx, description, response)
-
-                # Check if last.
-                ctx, description = slapp_ctx_queue[0]
-                if description.startswith("autoseed_end"):
-                    await handle_autoseed(ctx, description, None)
-                    slapp_ctx_queue.popleft()
-
+            request = slapp_ctx_queue.popleft()
+            slapp_dispatcher.done(request)
+            ctx, description, future = request.Item
+            if future is not None:
+                if not future.done():
+                    future.set_result((success_message, response))
             else:
                 await send_slapp(ctx=ctx,
                                  success_message=success_message,
                                  response=response)
 
-
     loop = asyncio.get_event_loop()
     loop.run_until_complete(
         asyncio.gather(
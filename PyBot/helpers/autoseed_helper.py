@@ -0,0 +1,265 @@
+import asyncio
+from collections import namedtuple
+from operator import attrgetter
+from os import makedirs
+from os.path import exists, join, isfile, basename
+from typing import List, Dict, Tuple, Optional
+
+from PyBot.constants.emojis import TROPHY, CROWN
+from PyBot.helpers.slapp_job_helper import SlappLookupJob, SlappLookup, JobProgress, MAX_CONCURRENT_LOOKUPS
+from core_classes.builtins import UNKNOWN_PLAYER
+from core_classes.skill import Skill
+from core_classes.source_metadata import BATTLEFY_ID_PATTERN
+from helpers.str_helper import truncate
+from misc import utils
+from misc.slapp_files_utils import AUTOSEED_SAVE_DIR
+from slapp_py import slapipes
+from slapp_py.slapp_response_object import SlappResponseObject
+
+MIN_TEAM_PLAYERS = 4
+
+
+class SeededPlayer:
+    """
+    A player's autoseed result, persisted per tournament so that re-seeding only looks up new or changed players.
+    """
+
+    in_game_name: str
+    """The player's Battlefy in-game name when they were looked up."""
+
+    name: str
+    """The name to show for the player."""
+
+    skill: Skill
+    top500: bool
+
+    awards: List[str]
+    """Descriptions of the brackets that the player has won."""
+
+    problem: Optional[str]
+    """A message about the lookup to report on each run, e.g. if the player matched more than once."""
+
+    def __init__(self,
+                 in_game_name: str,
+                 name: str,
+                 skill: Optional[Skill] = None,
+                 top500: bool = False,
+                 awards: Optional[List[str]] = None,
+                 problem: Optional[str] = None):
+        self.in_game_name = in_game_name
+        self.name = name
+        self.skill = skill or Skill()
+        self.top500 = top500
+        self.awards = awards or []
+        self.problem = problem
+
+    @staticmethod
+    def from_dict(obj: dict) -> 'SeededPlayer':
+        assert isinstance(obj, dict)
+        return SeededPlayer(
+            in_game_name=obj.get("InGameName"),
+            name=obj.get("Name", UNKNOWN_PLAYER),
+            skill=Skill.from_dict(obj["Skill"]) if "Skill" in obj else None,
+            top500=obj.get("Top500", False),
+            awards=obj.get("Awards", []),
+            problem=obj.get("Problem", None)
+        )
+
+    def to_dict(self) -> dict:
+        result = {"InGameName": self.in_game_name, "Name": self.name, "Skill": self.skill.to_dict()}
+        if self.top500:
+            result["Top500"] = self.top500
+        if self.awards:
+            result["Awards"] = self.awards
+        if self.problem:
+            result["Problem"] = self.problem
+        return result
+
+
+def get_snapshot_version() -> Optional[str]:
+    """
+    Get the version of the Players snapshot that Slapp loaded, which is the snapshot file's name,
+    or None if it isn't known.
+    """
+    file = slapipes.slapp_snapshot_file
+    return basename(file) if file else None
+
+
+def _autoseed_path(tourney_id: str) -> str:
+    return join(AUTOSEED_SAVE_DIR, f'{tourney_id}.json')
+
+
+def load_autoseed_results(tourney_id: str, snapshot_version: Optional[str]) -> Dict[str, SeededPlayer]:
+    """
+    Load the tournament's persisted autoseed results, keyed by persistentPlayerID.
+    Results from a different or unknown snapshot version are stale, so in that case nothing is returned,
+    as is the case if the save file can't be read.
+    """
+    path = _autoseed_path(tourney_id)
+    if not snapshot_version or not BATTLEFY_ID_PATTERN.match(tourney_id) or not isfile(path):
+        return dict()
+
+    try:
+        loaded = utils.load_json_from_file(path)
+        if loaded.get("Snapshot") != snapshot_version:
+            return dict()
+        return {persistent_id: SeededPlayer.from_dict(d) for persistent_id, d in loaded.get("Players", {}).items()}
+    except Exception as e:
+        print(f'Ignoring the autoseed results in {path} as they could not be read: {e}')
+        return dict()
+
+
+def save_autoseed_results(tourney_id: str, snapshot_version: Optional[str], players: Dict[str, SeededPlayer]):
+    """Persist the tournament's autoseed results, keyed by persistentPlayerID, for the snapshot version."""
+    if not snapshot_version:
+        print('Not saving the autoseed results as the snapshot that Slapp loaded is not known.')
+        return
+
+    if not BATTLEFY_ID_PATTERN.match(tourney_id):
+        print(f'Not saving the autoseed results as {tourney_id=} is not a Battlefy id.')
+        return
+
+    if not exists(AUTOSEED_SAVE_DIR):
+        makedirs(AUTOSEED_SAVE_DIR)
+
+    utils.save_as_json_to_file(_autoseed_path(tourney_id), {
+        "Snapshot": snapshot_version,
+        "Players": {persistent_id: player.to_dict() for persistent_id, player in players.items()}
+    })
+
+
+SeededTeam = namedtuple('SeededTeam', ('team_id', 'name', 'player_names', 'clout', 'confidence', 'awards', 'skills'))
+"""A team's autoseed result: its persistent id, name, player names, max clout and its confidence, awards string,
+and the players' skills."""
+
+
+class AutoseedJob(SlappLookupJob):
+    """
+    Seed the teams of one Battlefy tournament by looking up their players in Slapp.
+    Each ~autoseed invocation has its own job, so concurrent autoseeds do not share any state.
+    Players in known_players whose in-game name is unchanged are not looked up again.
+    """
+
+    def __init__(self,
+                 tournament: List[dict],
+                 lookup: SlappLookup,
+                 progress: Optional[JobProgress] = None,
+                 max_concurrent_lookups: int = MAX_CONCURRENT_LOOKUPS,
+                 known_players: Optional[Dict[str, SeededPlayer]] = None):
+        """
+        :param tournament: The tournament's teams, as downloaded from Battlefy
+        :param lookup: Coroutine function to look up a query in Slapp
+        :param progress: Optional coroutine function that is awaited with (done, total) lookups as they complete
+        :param max_concurrent_lookups: The most lookups to have in flight at once
+        :param known_players: Results of a previous run against the same snapshot, keyed by persistentPlayerID
+        """
+        super().__init__(lookup, progress, max_concurrent_lookups)
+        self.tournament = tournament
+        self.known_players = known_players or dict()
+        self.problems: List[str] = []
+        """Messages about teams or players that could not be seeded properly."""
+
+        self.players: Dict[str, SeededPlayer] = dict()
+        """The results of this run that can be reused, keyed by persistentPlayerID. Failed lookups are left out."""
+
+        self.reused = 0
+        """The number of players whose result was reused from known_players."""
+
+    def _players_by_team(self) -> Dict[str, Tuple[str, List[dict]]]:
+        """Get the team name and players with a persistent id, keyed by persistentTeamID, of the teams to seed."""
+        teams: Dict[str, Tuple[str, List[dict]]] = {}
+        for team in self.tournament:
+            name = team.get('name', None)
+            team_id = team.get('persistentTeamID', None)
+
+            if not name or not team_id:
+                continue
+
+            players = team.get('players', None)
+            if not players:
+                self.problems.append(f'The team {name} ({team_id}) has no players!')
+                continue
+
+            ignored_players = [truncate(player.get("inGameName", "(unknown player)"), 25, '…')
+                               for player in players if not player.get('persistentPlayerID')]
+
+            players = [player for player in players if player.get('persistentPlayerID')]
+            if len(players) < MIN_TEAM_PLAYERS:
+                self.problems.append(f"Ignoring the player(s) from team {name} ({team_id}) as they don't have a "
+                                     f"persistent id: [{', '.join(ignored_players)}]")
+                self.problems.append(f"The team {name} ({team_id}) only has {len(players)} players, "
+                                     f"not calculating.")
+                continue
+
+            teams[team_id] = (name, players)
+        return teams
+
+    def _get_known(self, battlefy_player: dict) -> Optional[SeededPlayer]:
+        known = self.known_players.get(battlefy_player['persistentPlayerID'])
+        if known and known.in_game_name == battlefy_player.get('inGameName'):
+            return known
+        return None
+
+    async def _lookup_player(self, battlefy_player: dict) -> SeededPlayer:
+        """Look up the Battlefy player in Slapp by their persistent id and return their result,
+        with default skill if they aren't matched exactly once."""
+        persistent_id = battlefy_player['persistentPlayerID']
+        in_game_name = battlefy_player.get('inGameName')
+        name = in_game_name or UNKNOWN_PLAYER
+
+        known = self._get_known(battlefy_player)
+        if known:
+            self.reused += 1
+        else:
+            success_message, response = await self._lookup(persistent_id)
+            if success_message != "OK" or not response:
+                self.problems.append(f"Couldn't look up player {name} ({persistent_id}) 😔 ({success_message})")
+                return SeededPlayer(in_game_name, name)
+
+            known = self._to_seeded_player(in_game_name, persistent_id, SlappResponseObject(response))
+
+        self.players[persistent_id] = known
+        if known.problem:
+            self.problems.append(known.problem)
+        return known
+
+    @staticmethod
+    def _to_seeded_player(in_game_name: Optional[str], persistent_id: str, r: SlappResponseObject) -> SeededPlayer:
+        name = in_game_name or UNKNOWN_PLAYER
+        if r.matched_players_len == 1:
+            p = r.matched_players[0]
+            return SeededPlayer(in_game_name, p.name.value, p.skill, p.top500, r.get_first_placements(p))
+
+        problem = None
+        if r.matched_players_len > 1:
+            problem = f"Too many matches for player {name} ({persistent_id}) 😔 ({r.matched_players_len=})"
+        return SeededPlayer(in_game_name, name, problem=problem)
+
+    async def _seed_team(self, team_id: str, name: str, players: List[dict]) -> SeededTeam:
+        team_players: List[SeededPlayer] = list(await asyncio.gather(*[self._lookup_player(p) for p in players]))
+
+        player_skills = sorted((player.skill for player in team_players), reverse=True)
+        awards = TROPHY * len({award for player in team_players for award in player.awards})
+        awards += CROWN * len([player for player in team_players if player.top500])
+        (_, _), (max_clout, max_confidence) = Skill.team_clout(player_skills)
+        return SeededTeam(team_id, name,
+                          [truncate(player.name, 25, '…') for player in team_players],
+                          max_clout, max_confidence, awards, player_skills)
+
+    async def run(self) -> List[SeededTeam]:
+        """Look up every player concurrently and return the teams ordered from best to worst."""
+        teams = self._players_by_team()
+        self.total = sum(1 for _, players in teams.values() for player in players if not self._get_known(player))
+        await self._report_progress(force=True)
+
+        seeded: List[SeededTeam] = list(await asyncio.gather(*[self._seed_team(team_id, name, players)
+                                                               for team_id, (name, players) in teams.items()]))
+        await self._report_progress(force=True)
+        seeded.sort(key=attrgetter('clout'), reverse=True)
+        return seeded
+
+    @staticmethod
+    def format_lines(seeded: List[SeededTeam]) -> List[str]:
+        """Describe each seeded team on a line, in order."""
+        return [f"{truncate(team.name, 50, '…')} (Clout: {team.clout} with {team.confidence}% confidence) "
+                f"[{', '.join(team.player_names)}] {team.awards}" for team in seeded]
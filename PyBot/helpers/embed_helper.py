@@ -1,10 +1,22 @@
-from typing import Optional, Union, Tuple
+from typing import Optional, Union, Tuple, List
 
 import discord
 from discord import Embed, Color, Colour
 
 from helpers.str_helper import truncate
 
+EMBED_MAX_CHARACTERS = 6000
+"""The maximum sum of all characters in an embed structure."""
+
+EMBED_MAX_FIELDS = 25
+"""The maximum number of fields that Discord accepts in an embed."""
+
+PAGE_MAX_FIELDS = 20
+"""The number of fields we put on a page, within EMBED_MAX_FIELDS."""
+
+MAX_PAGES = 10
+"""The maximum number of pages (messages) to send for one result."""
+
 
 def to_embed(
         message: str,
@@ -42,3 +54,63 @@ def to_embed(
         image_url=image_url,
         title=truncate(title, 256, "…")  # Embed titles limited to 256 characters.
     )
+
+
+def paginate_embed(
+        builder: Embed,
+        max_pages: int = MAX_PAGES,
+        max_fields: int = PAGE_MAX_FIELDS,
+        max_characters: int = EMBED_MAX_CHARACTERS) -> List[Embed]:
+    """
+    Split an embed into pages that respect Discord's embed limits, in one pass over its fields.
+    The first page keeps the builder's title, description and footer; subsequent pages are titled "Page n".
+    A page never leaves a single field over for the next page.
+    Fields that do not fit in max_pages pages are dropped, as are a field too large for a page and those after it.
+
+    :param builder: The embed to split. It is not modified.
+    :param max_pages: The maximum number of pages to return
+    :param max_fields: The maximum number of fields per page, up to EMBED_MAX_FIELDS
+    :param max_characters: The maximum number of characters per page, up to EMBED_MAX_CHARACTERS
+    :return: The pages to send
+    """
+    assert max_fields <= EMBED_MAX_FIELDS
+    assert max_characters <= EMBED_MAX_CHARACTERS
+
+    fields: List[dict] = getattr(builder, '_fields', [])
+    sizes: List[int] = [len(field['name']) + len(field['value']) for field in fields]
+    colour = builder.colour
+
+    pages: List[Embed] = []
+    start = 0
+    page_number = 1
+    page_base_size = len(builder) - sum(sizes)
+    while page_number <= max_pages:
+        end = start
+        total = page_base_size
+        while end < len(fields) and end - start < max_fields and total + sizes[end] <= max_characters:
+            total += sizes[end]
+            end += 1
+
+        # A field cannot be left alone on the next page.
+        if len(fields) - end == 1 and end > start:
+            end -= 1
+            total -= sizes[end]
+
+        if page_number == 1:
+            page = builder.copy()
+        else:
+            page = Embed(title=f'Page {page_number}', colour=colour, description='')
+        if fields:
+            page._fields = fields[start:end]
+
+        if end > start or (page_number == 1 and total):
+            pages.append(page)
+
+        # Stop if every field is sent, or if the next field cannot fit on a page of its own.
+        if end >= len(fields) or end == start:
+            break
+
+        start = end
+        page_number += 1
+        page_base_size = len(f'Page {page_number}')
+    return pages
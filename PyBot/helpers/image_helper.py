@@ -0,0 +1,93 @@
+import asyncio
+from io import BytesIO
+from typing import Optional, Callable, Awaitable, Hashable
+
+import aiohttp
+
+from helpers.cache_helper import LRUCache
+
+IMAGE_FORMATS = ["image/png", "image/jpeg", "image/jpg", "image/webp", "image/gif"]
+"""The content types that we accept for an image url."""
+
+MAX_IMAGE_BYTES = 8 * 1024 * 1024
+"""The largest image that we'll download, in bytes."""
+
+DOWNLOAD_TIMEOUT_SECONDS = 15
+"""The longest that we'll spend downloading an image."""
+
+JPEG_CACHE_MAX_ENTRIES = 512
+JPEG_CACHE_MAX_BYTES = 64 * 1024 * 1024
+"""The most encoded JPEG bytes that we keep in jpeg_cache."""
+
+_CHUNK_SIZE = 64 * 1024
+
+jpeg_cache: LRUCache = LRUCache(max_entries=JPEG_CACHE_MAX_ENTRIES, max_size=JPEG_CACHE_MAX_BYTES, size_of=len)
+"""Encoded JPEG bytes keyed by (image key, quality), where the image key is the url or the avatar's identity."""
+
+
+class ImageFetchError(Exception):
+    """Raised when an image can't be downloaded. The message is suitable to show to the user."""
+
+
+async def fetch_image(url: str,
+                      max_bytes: int = MAX_IMAGE_BYTES,
+                      timeout_seconds: float = DOWNLOAD_TIMEOUT_SECONDS) -> bytes:
+    """
+    Download the image at the url without blocking the event loop.
+    The download is streamed and abandoned as soon as it goes over max_bytes or timeout_seconds.
+
+    :raises ImageFetchError: if the url is not an image, is too big, or can't be downloaded in time
+    """
+    timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+    try:
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    raise ImageFetchError(f'the server responded {response.status} {response.reason}')
+
+                if response.content_type not in IMAGE_FORMATS:
+                    raise ImageFetchError(f'not an image ({response.content_type})')
+
+                if response.content_length is not None and response.content_length > max_bytes:
+                    raise ImageFetchError(f'the image is bigger than {max_bytes // (1024 * 1024)} MiB')
+
+                buffer = bytearray()
+                async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                    buffer.extend(chunk)
+                    if len(buffer) > max_bytes:
+                        raise ImageFetchError(f'the image is bigger than {max_bytes // (1024 * 1024)} MiB')
+                return bytes(buffer)
+    except asyncio.TimeoutError:
+        raise ImageFetchError(f'the download took longer than {timeout_seconds} seconds')
+    except aiohttp.ClientError as e:
+        raise ImageFetchError(f'the download failed ({e})')
+
+
+def transcode_to_jpeg(image_bytes: bytes, quality: int) -> bytes:
+    """Decode the image and encode it as a JPEG at the quality. This is CPU-bound, so run it in an executor."""
+    from PIL import Image
+    with Image.open(BytesIO(image_bytes)) as im:
+        output = BytesIO()
+        im.convert("RGB").save(output, format='JPEG', quality=quality)
+    return output.getvalue()
+
+
+async def to_jpeg(image_bytes: bytes, quality: int, loop: Optional[asyncio.AbstractEventLoop] = None) -> bytes:
+    """Transcode the image to a JPEG at the quality in the default executor, off the event loop."""
+    loop = loop or asyncio.get_event_loop()
+    return await loop.run_in_executor(None, transcode_to_jpeg, image_bytes, quality)
+
+
+async def get_or_make_jpeg(image_key: Hashable, quality: int, fetch: Callable[[], Awaitable[bytes]]) -> bytes:
+    """
+    Get the JPEG of the image at the quality from jpeg_cache, or fetch the image, transcode it, and cache the result.
+    :param image_key: Identifies the image, e.g. its url or the avatar's hash
+    :param quality: The JPEG quality
+    :param fetch: Called to download the image on a cache miss
+    """
+    key = (image_key, quality)
+    jpeg_bytes = jpeg_cache.get(key)
+    if jpeg_bytes is None:
+        jpeg_bytes = await to_jpeg(await fetch(), quality)
+        jpeg_cache.put(key, jpeg_bytes)
+    return jpeg_bytes
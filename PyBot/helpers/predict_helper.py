@@ -0,0 +1,52 @@
+from core_classes.skill import Skill
+from helpers.str_helper import truncate
+from slapp_py.slapp_response_object import SlappResponseObject
+
+
+def predict_message(response_1: SlappResponseObject, response_2: SlappResponseObject) -> str:
+    """
+    Rate the match between the two described teams or players and predict the winner.
+    Each response should describe exactly one team, or exactly one player.
+    """
+    if response_1.matched_players_len == 1 and response_2.matched_players_len == 1:
+        matching_mode = 'players'
+    elif response_1.matched_teams_len == 1 and response_2.matched_teams_len == 1:
+        matching_mode = 'teams'
+    else:
+        return f"I didn't get the right number of players/teams back 😔 " \
+               f"({response_1.matched_players_len=}/{response_1.matched_teams_len=}, " \
+               f"{response_2.matched_players_len=}/{response_2.matched_teams_len=})"
+
+    message = ''
+    if matching_mode == 'teams':
+        team_1 = response_1.matched_teams[0]
+        team_1_skills = response_1.get_team_skills(team_1.guid).values()
+        if team_1_skills:
+            (_, _), (max_clout_1, max_conf_1) = Skill.team_clout(team_1_skills)
+            message += Skill.make_message_clout(max_clout_1, max_conf_1, truncate(team_1.name.value, 25, "…")) + '\n'
+
+        team_2 = response_2.matched_teams[0]
+        team_2_skills = response_2.get_team_skills(team_2.guid).values()
+        if team_2_skills:
+            (_, _), (max_clout_2, max_conf_2) = Skill.team_clout(team_2_skills)
+            message += Skill.make_message_clout(max_clout_2, max_conf_2, truncate(team_2.name.value, 25, "…")) + '\n'
+
+        if team_1_skills and team_2_skills:
+            favouring_team_1, favouring_team_2 = Skill.calculate_quality_of_game_teams(team_1_skills, team_2_skills)
+            if max_conf_1 > 2 and max_conf_2 > 2:
+                if favouring_team_1 != favouring_team_2:
+                    message += "Hmm, it'll depend on who's playing, but... "
+
+                message += Skill.make_message_fairness(favouring_team_1)
+        else:
+            message += "Hmm, I don't have any skill information to make a good guess on the outcome."
+
+    else:
+        p1 = response_1.matched_players[0]
+        message += Skill.make_message_clout(p1.skill.clout, p1.skill.confidence, truncate(p1.name.value, 25, "…")) + '\n'
+        p2 = response_2.matched_players[0]
+        message += Skill.make_message_clout(p2.skill.clout, p2.skill.confidence, truncate(p2.name.value, 25, "…")) + '\n'
+        quality = Skill.calculate_quality_of_game_players(p1.skill, p2.skill)
+        message += Skill.make_message_fairness(quality)
+
+    return message
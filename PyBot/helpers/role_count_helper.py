@@ -0,0 +1,162 @@
+import asyncio
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from discord import Guild
+
+RoleIds = FrozenSet[int]
+
+MEMBER_EVENTS = ('GUILD_MEMBER_ADD', 'GUILD_MEMBER_UPDATE', 'GUILD_MEMBER_REMOVE', 'GUILD_ROLE_DELETE')
+"""The raw gateway events of a guild that change its role counts."""
+
+
+class RoleCounter:
+    """
+    Counts the members of each role in each guild, so that counting is O(1) without the member cache.
+
+    A guild's counts are loaded from the API the first time that they're needed, and are then kept up to date from the
+    raw gateway member and role events (see on_socket_response), as discord.py only dispatches member events for
+    cached members. Only each member's role ids are kept, and identical sets of role ids are shared between members.
+    """
+
+    def __init__(self):
+        self._member_roles: Dict[int, Dict[int, RoleIds]] = dict()
+        """Each loaded guild's members' role ids, keyed by guild id and then member id."""
+
+        self._counts: Dict[int, Counter] = dict()
+        """Each loaded guild's number of members by role id."""
+
+        self._pending: Dict[int, List[dict]] = dict()
+        """The raw events of each guild that is loading, to apply once it has loaded, keyed by guild id."""
+
+        self._role_sets: Dict[RoleIds, RoleIds] = dict()
+        """The shared sets of role ids, which are dropped once no member has them."""
+
+        self._role_set_refs: Counter = Counter()
+        """The number of members across all guilds that have each shared set of role ids."""
+
+        self._loading: Dict[int, asyncio.Task] = dict()
+
+    def _acquire(self, role_ids: Iterable) -> RoleIds:
+        """Get the shared set of the role ids for a member to keep, to be released when the member no longer has it."""
+        role_ids = frozenset(int(role_id) for role_id in role_ids)
+        role_ids = self._role_sets.setdefault(role_ids, role_ids)
+        self._role_set_refs[role_ids] += 1
+        return role_ids
+
+    def _release(self, role_ids: RoleIds):
+        self._role_set_refs[role_ids] -= 1
+        if self._role_set_refs[role_ids] <= 0:
+            del self._role_set_refs[role_ids]
+            del self._role_sets[role_ids]
+
+    def _set_member_roles(self, guild_id: int, member_id: int, role_ids: Optional[Iterable]):
+        members = self._member_roles.get(guild_id)
+        if members is None:
+            return
+
+        counts = self._counts[guild_id]
+        if role_ids is not None:
+            # Acquired before the old set is released, so that a member whose roles are unchanged keeps the same set.
+            role_ids = self._acquire(role_ids)
+        old_role_ids = members.pop(member_id, None)
+        if old_role_ids is not None:
+            counts.subtract(old_role_ids)
+            self._release(old_role_ids)
+        if role_ids is not None:
+            members[member_id] = role_ids
+            counts.update(role_ids)
+
+    async def _load(self, guild: Guild):
+        # Loading takes a request per page of members, and members can join, leave, or change roles in the meantime.
+        # Their events are held until the loaded members are in place and then applied in order: each event carries
+        # the member's roles at that point, so replaying them gives the latest roles of any member who has changed.
+        self._pending[guild.id] = []
+        members: Dict[int, RoleIds] = dict()
+        loaded = False
+        try:
+            async for member in guild.fetch_members(limit=None):
+                # The @everyone role is implied, and is counted by guild.member_count instead.
+                role_ids = self._acquire(role.id for role in member.roles if not role.is_default())
+                old_role_ids = members.pop(member.id, None)
+                if old_role_ids is not None:
+                    self._release(old_role_ids)
+                members[member.id] = role_ids
+            loaded = True
+        finally:
+            pending = self._pending.pop(guild.id, None)
+            if not loaded or pending is None:
+                # The load failed, or the bot left the guild while it was loading.
+                for role_ids in members.values():
+                    self._release(role_ids)
+
+        if pending is None:
+            return
+
+        counts = Counter()
+        for role_ids in members.values():
+            counts.update(role_ids)
+        self._member_roles[guild.id] = members
+        self._counts[guild.id] = counts
+        for msg in pending:
+            self._apply(msg)
+
+    async def count(self, guild: Guild, role_id: int) -> int:
+        """Get the number of members in the guild with the role, loading the guild's members the first time."""
+        if guild.id not in self._counts:
+            task = self._loading.get(guild.id)
+            if task is None:
+                task = self._loading[guild.id] = asyncio.ensure_future(self._load(guild))
+            try:
+                await asyncio.shield(task)
+            finally:
+                if task.done():
+                    self._loading.pop(guild.id, None)
+        # The guild is forgotten if the bot left it while it was loading.
+        counts = self._counts.get(guild.id)
+        return counts[role_id] if counts is not None else 0
+
+    def on_socket_response(self, msg: dict):
+        """
+        Apply a raw gateway event, if it's a member or role event of a loaded guild.
+        The events of a guild that is loading are held until it has loaded.
+        """
+        event = msg.get('t')
+        if event in MEMBER_EVENTS:
+            pending = self._pending.get(int(msg['d']['guild_id']))
+            if pending is not None:
+                pending.append(msg)
+                return
+        elif event == 'GUILD_DELETE':
+            # Stop holding the guild's events too, so that its load doesn't apply them.
+            self._pending.pop(int(msg['d']['id']), None)
+        self._apply(msg)
+
+    def _apply(self, msg: dict):
+        event = msg.get('t')
+        data = msg.get('d')
+        if event in ('GUILD_MEMBER_ADD', 'GUILD_MEMBER_UPDATE'):
+            self._set_member_roles(int(data['guild_id']), int(data['user']['id']), data.get('roles', []))
+        elif event == 'GUILD_MEMBER_REMOVE':
+            self._set_member_roles(int(data['guild_id']), int(data['user']['id']), None)
+        elif event == 'GUILD_ROLE_DELETE':
+            self._on_role_delete(int(data['guild_id']), int(data['role_id']))
+        elif event == 'GUILD_DELETE':
+            self.forget(int(data['id']))
+
+    def _on_role_delete(self, guild_id: int, role_id: int):
+        members = self._member_roles.get(guild_id)
+        if members is None:
+            return
+
+        for member_id, role_ids in members.items():
+            if role_id in role_ids:
+                members[member_id] = self._acquire(role_ids - {role_id})
+                self._release(role_ids)
+        self._counts[guild_id].pop(role_id, None)
+
+    def forget(self, guild_id: int):
+        """Forget the guild's members, e.g. when the bot leaves it or the guild becomes unavailable."""
+        for role_ids in self._member_roles.pop(guild_id, dict()).values():
+            self._release(role_ids)
+        self._counts.pop(guild_id, None)
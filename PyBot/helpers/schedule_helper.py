@@ -0,0 +1,249 @@
+import asyncio
+import time
+from collections import deque, Counter
+from typing import Callable, Deque, Dict, Generic, Hashable, Optional, TypeVar
+
+from discord.ext.commands import CheckFailure
+
+T = TypeVar('T')
+
+USER_BUCKET_CAPACITY = 5
+"""The burst of Slapp commands that one user can make."""
+
+USER_REFILL_PER_SECOND = 0.5
+"""The sustained rate of Slapp commands that one user can make."""
+
+GUILD_BUCKET_CAPACITY = 20
+"""The burst of Slapp commands that one guild can make."""
+
+GUILD_REFILL_PER_SECOND = 2
+"""The sustained rate of Slapp commands that one guild can make."""
+
+MAX_BUCKETS = 10000
+"""Full buckets are dropped when there are more than this many, as a full bucket is the same as a new one."""
+
+SLAPP_MAX_IN_FLIGHT = 4
+"""The most queries that are written to Slapp before their responses come back. The rest wait to be dispatched
+fairly, as Slapp answers its queries in order."""
+
+SLAPP_DISPATCH_TIMEOUT_SECONDS = 120
+"""How long a query written to Slapp holds its slot before it's given up on, so that lost responses can't stall
+the queries that are waiting."""
+
+
+class TokenBucket:
+    """A bucket of tokens that refills at a constant rate up to its capacity. Each request takes tokens from it."""
+
+    def __init__(self, capacity: float, refill_per_second: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.clock = clock
+        self.tokens = capacity
+        self._last_refill = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self.refill_per_second)
+        self._last_refill = now
+
+    @property
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    def retry_after(self, cost: float = 1) -> float:
+        """Get the seconds until the bucket has the cost in tokens, 0 if it has them now."""
+        self._refill()
+        return max(0.0, (cost - self.tokens) / self.refill_per_second)
+
+    def take(self, cost: float = 1):
+        self._refill()
+        self.tokens -= cost
+
+
+class SlappThrottled(CheckFailure):
+    """Raised by the rate limit check when a user or guild has made too many Slapp commands."""
+
+    def __init__(self, scope: str, retry_after: float):
+        self.scope = scope
+        """'user' or 'guild'."""
+
+        self.retry_after = retry_after
+        super().__init__(f'Too many requests from this {scope}, try again in {retry_after:.0f}s.')
+
+
+class RateLimiter:
+    """
+    Token bucket limits on the Slapp commands of each user and of each guild.
+    A command is only allowed if both the user's and the guild's bucket have the tokens, and it then takes from both.
+    """
+
+    def __init__(self,
+                 user_capacity: float = USER_BUCKET_CAPACITY,
+                 user_refill_per_second: float = USER_REFILL_PER_SECOND,
+                 guild_capacity: float = GUILD_BUCKET_CAPACITY,
+                 guild_refill_per_second: float = GUILD_REFILL_PER_SECOND,
+                 clock: Callable[[], float] = time.monotonic):
+        self.user_capacity = user_capacity
+        self.user_refill_per_second = user_refill_per_second
+        self.guild_capacity = guild_capacity
+        self.guild_refill_per_second = guild_refill_per_second
+        self.clock = clock
+
+        self.allowed = 0
+        """The number of commands that were allowed."""
+
+        self.throttled: Counter = Counter()
+        """The number of commands that were throttled, by scope ('user' or 'guild')."""
+
+        self.throttled_users: Counter = Counter()
+        """The number of commands that were throttled, by user id."""
+
+        self._user_buckets: Dict[int, TokenBucket] = dict()
+        self._guild_buckets: Dict[int, TokenBucket] = dict()
+
+    def _get_bucket(self, buckets: Dict[int, TokenBucket], key: int, capacity: float, refill: float) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) >= MAX_BUCKETS:
+                for full_key in [k for k, b in buckets.items() if b.is_full]:
+                    del buckets[full_key]
+            bucket = buckets[key] = TokenBucket(capacity, refill, self.clock)
+        return bucket
+
+    def acquire(self, user_id: int, guild_id: Optional[int], cost: float = 1):
+        """
+        Take the cost from the user's and guild's buckets.
+        :raises SlappThrottled: if either bucket doesn't have the tokens, in which case neither is taken from
+        """
+        user_bucket = self._get_bucket(self._user_buckets, user_id, self.user_capacity, self.user_refill_per_second)
+        retry_after = user_bucket.retry_after(cost)
+        if retry_after:
+            self.throttled['user'] += 1
+            self.throttled_users[user_id] += 1
+            raise SlappThrottled('user', retry_after)
+
+        guild_bucket = None
+        if guild_id is not None:
+            guild_bucket = self._get_bucket(self._guild_buckets, guild_id,
+                                            self.guild_capacity, self.guild_refill_per_second)
+            retry_after = guild_bucket.retry_after(cost)
+            if retry_after:
+                self.throttled['guild'] += 1
+                self.throttled_users[user_id] += 1
+                raise SlappThrottled('guild', retry_after)
+
+        user_bucket.take(cost)
+        if guild_bucket:
+            guild_bucket.take(cost)
+        self.allowed += 1
+
+
+class FairDispatcher(Generic[T]):
+    """
+    Dispatches requests with at most max_in_flight outstanding, taking turns between keys (e.g. guilds).
+    Each key has its own FIFO queue, and the keys with waiting requests are served round-robin,
+    so a key with a long backlog (e.g. an autoseed) only gets every other turn when another key is waiting.
+    """
+
+    def __init__(self,
+                 dispatch: Callable[[T], bool],
+                 max_in_flight: int = SLAPP_MAX_IN_FLIGHT,
+                 timeout_seconds: Optional[float] = None,
+                 on_timeout: Optional[Callable[[T], None]] = None):
+        """
+        :param dispatch: Called with each request when it's its turn, and returns if it was sent, e.g. False if the
+        request was abandoned while it waited. Must not yield to the event loop.
+        :param max_in_flight: The most requests to have dispatched and not yet done
+        :param timeout_seconds: Optional deadline for each dispatched request, after which its slot is freed
+        :param on_timeout: Optional function called with a request that reached its deadline before it was done
+        """
+        self.dispatch = dispatch
+        self.max_in_flight = max_in_flight
+        self.timeout_seconds = timeout_seconds
+        self.on_timeout = on_timeout
+
+        self.dispatched = 0
+        """The number of requests that have been dispatched."""
+
+        self.timed_out = 0
+        """The number of dispatched requests that reached their deadline."""
+
+        self.max_waiting = 0
+        """The most requests that have been waiting at once."""
+
+        self._waiting = 0
+        self._queues: Dict[Hashable, Deque[T]] = dict()
+        self._turns: Deque[Hashable] = deque()
+        """The keys with waiting requests, in the order that they get their turn."""
+
+        self._in_flight: Dict[int, T] = dict()
+        """The dispatched requests that hold a slot, keyed by the id of the request."""
+
+        self._deadlines: Dict[int, asyncio.TimerHandle] = dict()
+        """The deadlines of the dispatched requests that aren't done, keyed by the id of the request."""
+
+    @property
+    def in_flight(self) -> int:
+        """The number of dispatched requests that hold a slot."""
+        return len(self._in_flight)
+
+    @property
+    def waiting(self) -> int:
+        """The number of requests waiting to be dispatched."""
+        return self._waiting
+
+    def submit(self, key: Hashable, request: T):
+        """Queue the request under the key and dispatch whatever can be."""
+        if key not in self._queues:
+            self._queues[key] = deque()
+            self._turns.append(key)
+        self._queues[key].append(request)
+        self._waiting += 1
+        self.max_waiting = max(self.max_waiting, self._waiting)
+        self._pump()
+
+    def done(self, request: T):
+        """
+        Mark a dispatched request as done, e.g. when its response comes back, and dispatch the next.
+        Requests that aren't in flight, e.g. because they're already done, are ignored.
+        """
+        deadline = self._deadlines.pop(id(request), None)
+        if deadline:
+            deadline.cancel()
+        self.release(request)
+
+    def release(self, request: T):
+        """
+        Free a dispatched request's slot without marking it as done, e.g. when nothing is waiting for its response
+        anymore, and dispatch the next. Its deadline still applies.
+        """
+        if self._in_flight.pop(id(request), None) is not None:
+            self._pump()
+
+    def _expire(self, request: T):
+        if self._deadlines.pop(id(request), None) is None:
+            return
+
+        self.timed_out += 1
+        if self.on_timeout:
+            self.on_timeout(request)
+        self.release(request)
+
+    def _pump(self):
+        while self.in_flight < self.max_in_flight and self._turns:
+            key = self._turns.popleft()
+            queue = self._queues[key]
+            request = queue.popleft()
+            self._waiting -= 1
+            if queue:
+                self._turns.append(key)
+            else:
+                del self._queues[key]
+
+            if self.dispatch(request):
+                self._in_flight[id(request)] = request
+                if self.timeout_seconds is not None:
+                    self._deadlines[id(request)] = \
+                        asyncio.get_event_loop().call_later(self.timeout_seconds, self._expire, request)
+                self.dispatched += 1
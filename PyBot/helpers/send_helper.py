@@ -0,0 +1,124 @@
+import asyncio
+from collections import deque
+from typing import Optional, Deque, Dict, Iterable, List, Union
+
+from discord import Embed, File, Message
+from discord.abc import Messageable
+from discord.ext.commands import Context
+
+MESSAGE_MAX_CHARACTERS = 2000
+"""The maximum number of characters in a Discord message's content."""
+
+
+class _OutgoingMessage:
+    __slots__ = ('destination', 'content', 'embed', 'file', 'merge', 'future')
+
+    def __init__(self,
+                 destination: Union[Context, Messageable],
+                 content: Optional[str],
+                 embed: Optional[Embed],
+                 file: Optional[File],
+                 merge: bool,
+                 future: asyncio.Future):
+        self.destination = destination
+        self.content = content
+        self.embed = embed
+        self.file = file
+        self.merge = merge and content is not None and embed is None and file is None
+        self.future = future
+
+
+def _log_failure(future: asyncio.Future):
+    if not future.cancelled() and future.exception():
+        print(f'Failed to send a queued message: {future.exception()}')
+
+
+class ChannelSender:
+    """
+    Sends messages through one ordered queue per channel.
+
+    Each channel has a worker that sends its queue in order, so callers can queue all the pages of a result at once
+    and a page is sent as soon as the previous one is accepted. Channels do not wait on each other.
+    Rate limits are left to discord.py's HTTP client, which holds each route's bucket lock until the bucket resets
+    when the X-RateLimit-Remaining header reaches zero, and retries on 429.
+    As the queue keeps one request per channel in flight, queued messages wait in order behind the bucket.
+
+    Text messages queued with merge=True are combined with the mergeable messages queued behind them,
+    up to MESSAGE_MAX_CHARACTERS, so that runs of small messages go out in fewer sends.
+    """
+
+    def __init__(self, max_characters: int = MESSAGE_MAX_CHARACTERS):
+        self.max_characters = max_characters
+        self.sends = 0
+        """The number of messages actually sent to Discord."""
+
+        self.merged = 0
+        """The number of queued messages that were merged into another rather than sent on their own."""
+
+        self._queues: Dict[int, Deque[_OutgoingMessage]] = dict()
+        self._workers: Dict[int, asyncio.Task] = dict()
+
+    @staticmethod
+    def _channel_id(destination: Union[Context, Messageable]) -> int:
+        channel = destination.channel if isinstance(destination, Context) else destination
+        return channel.id
+
+    def send(self,
+             destination: Union[Context, Messageable],
+             content: Optional[str] = None,
+             *,
+             embed: Optional[Embed] = None,
+             file: Optional[File] = None,
+             merge: bool = False) -> 'asyncio.Future[Message]':
+        """
+        Queue a message to the destination's channel.
+        Returns a future for the sent Message which can be awaited, or ignored: failures are logged either way.
+        Merged messages' futures all resolve to the one Message that was sent.
+        """
+        future = asyncio.get_event_loop().create_future()
+        future.add_done_callback(_log_failure)
+
+        key = self._channel_id(destination)
+        queue = self._queues.setdefault(key, deque())
+        queue.append(_OutgoingMessage(destination, content, embed, file, merge, future))
+
+        if key not in self._workers:
+            self._workers[key] = asyncio.ensure_future(self._run(key))
+        return future
+
+    async def send_pages(self, destination: Union[Context, Messageable], pages: Iterable[Embed]) -> List[Message]:
+        """Queue all of the embed pages to the destination's channel and wait until they have been sent."""
+        return list(await asyncio.gather(*[self.send(destination, embed=page) for page in pages]))
+
+    def _take_merged(self, queue: Deque[_OutgoingMessage], first: _OutgoingMessage) -> List[_OutgoingMessage]:
+        items = [first]
+        length = len(first.content)
+        while queue and queue[0].merge and length + 1 + len(queue[0].content) <= self.max_characters:
+            item = queue.popleft()
+            length += 1 + len(item.content)
+            items.append(item)
+        return items
+
+    async def _run(self, key: int):
+        queue = self._queues[key]
+        try:
+            while queue:
+                first = queue.popleft()
+                items = self._take_merged(queue, first) if first.merge else [first]
+                content = '\n'.join(item.content for item in items) if first.merge else first.content
+                try:
+                    message = await first.destination.send(content=content, embed=first.embed, file=first.file)
+                except Exception as e:
+                    for item in items:
+                        if not item.future.done():
+                            item.future.set_exception(e)
+                else:
+                    self.sends += 1
+                    self.merged += len(items) - 1
+                    for item in items:
+                        if not item.future.done():
+                            item.future.set_result(message)
+        finally:
+            del self._workers[key]
+            if not queue:
+                del self._queues[key]
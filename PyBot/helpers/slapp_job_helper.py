@@ -0,0 +1,65 @@
+import asyncio
+import time
+from typing import Callable, Awaitable, Tuple, Optional
+
+MAX_CONCURRENT_LOOKUPS = 16
+"""The most Slapp lookups that a job has in flight at once."""
+
+LOOKUP_TIMEOUT_SECONDS = 60
+"""How long to wait for Slapp to answer a lookup before giving up on it."""
+
+PROGRESS_INTERVAL_SECONDS = 2
+"""The minimum time between progress reports, as each report is a message edit."""
+
+SlappLookup = Callable[[str], Awaitable[Tuple[str, Optional[dict]]]]
+"""Looks up a query in Slapp, returning its (success message, response)."""
+
+JobProgress = Callable[[int, int], Awaitable]
+"""Awaited with the (done, total) lookups of a job as they complete."""
+
+
+class SlappLookupJob:
+    """
+    Base for the jobs that fan out many Slapp lookups for one command invocation, e.g. ~autoseed.
+    Lookups run concurrently, bounded by a semaphore, and progress is reported at most every
+    PROGRESS_INTERVAL_SECONDS.
+    """
+
+    def __init__(self,
+                 lookup: SlappLookup,
+                 progress: Optional[JobProgress] = None,
+                 max_concurrent_lookups: int = MAX_CONCURRENT_LOOKUPS):
+        """
+        :param lookup: Coroutine function to look up a query in Slapp
+        :param progress: Optional coroutine function that is awaited with (done, total) lookups as they complete
+        :param max_concurrent_lookups: The most lookups to have in flight at once
+        """
+        self.lookup = lookup
+        self.progress = progress
+
+        self.looked_up = 0
+        """The number of queries that have been looked up in Slapp."""
+
+        self.total = 0
+        """The number of queries that the job expects to look up, for progress reports."""
+
+        self._semaphore = asyncio.Semaphore(max_concurrent_lookups)
+        self._last_progress = 0.0
+
+    async def _report_progress(self, force: bool = False):
+        now = time.monotonic()
+        if self.progress and (force or now - self._last_progress >= PROGRESS_INTERVAL_SECONDS):
+            self._last_progress = now
+            await self.progress(self.looked_up, self.total)
+
+    async def _lookup(self, query: str) -> Tuple[str, Optional[dict]]:
+        """Look up the query once a slot is free, returning (success message, response). Counts towards progress."""
+        async with self._semaphore:
+            try:
+                result = await asyncio.wait_for(self.lookup(query), LOOKUP_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                result = 'Timed out', None
+
+        self.looked_up += 1
+        await self._report_progress()
+        return result
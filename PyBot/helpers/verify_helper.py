@@ -0,0 +1,94 @@
+import asyncio
+from collections import namedtuple
+from typing import List, Dict, Optional, Tuple
+
+from PyBot.helpers.autoseed_helper import MIN_TEAM_PLAYERS
+from PyBot.helpers.slapp_job_helper import SlappLookupJob, SlappLookup, JobProgress, MAX_CONCURRENT_LOOKUPS
+from helpers.str_helper import truncate
+from slapp_py.slapp_response_object import SlappResponseObject
+
+VerifiedTeam = namedtuple('VerifiedTeam', ('team_id', 'name', 'players', 'problems'))
+"""A team's verification result: its persistent id, name, number of players, and the problems found."""
+
+
+class VerifyJob(SlappLookupJob):
+    """
+    Verify every team of one Battlefy tournament by looking up their players' Battlefy slugs in Slapp.
+    A player is verified if Slapp matches them to exactly one player.
+    """
+
+    def __init__(self,
+                 tournament: List[dict],
+                 lookup: SlappLookup,
+                 progress: Optional[JobProgress] = None,
+                 max_concurrent_lookups: int = MAX_CONCURRENT_LOOKUPS):
+        """
+        :param tournament: The tournament's teams, as downloaded from Battlefy
+        :param lookup: Coroutine function to look up a query in Slapp
+        :param progress: Optional coroutine function that is awaited with (done, total) lookups as they complete
+        :param max_concurrent_lookups: The most lookups to have in flight at once
+        """
+        super().__init__(lookup, progress, max_concurrent_lookups)
+        self.tournament = tournament
+        self._lookups: Dict[str, asyncio.Task] = dict()
+        """Lookups by player slug, so that a player signed up to more than one team is only looked up once."""
+
+    def _lookup_once(self, player_slug: str) -> asyncio.Task:
+        if player_slug not in self._lookups:
+            self._lookups[player_slug] = asyncio.ensure_future(self._lookup(player_slug))
+        return self._lookups[player_slug]
+
+    async def _verify_player(self, player: dict) -> Optional[str]:
+        """Verify the Battlefy player, returning the problem if there is one."""
+        name = truncate(player.get('inGameName') or player.get('username') or '(unknown player)', 25, '…')
+        player_slug = player.get('userSlug')
+        if not player_slug:
+            return f'{name} has no slug'
+
+        success_message, response = await self._lookup_once(player_slug)
+        if success_message != "OK" or not response:
+            return f"{name} couldn't be looked up ({success_message})"
+
+        r = SlappResponseObject(response)
+        if r.matched_players_len == 0:
+            return f"{name} isn't known to Slapp"
+        if r.matched_players_len > 1:
+            return f'{name} matched {r.matched_players_len} players'
+        return None
+
+    async def _verify_team(self, team: dict) -> VerifiedTeam:
+        name = team.get('name') or '(unnamed team)'
+        team_id = team.get('persistentTeamID') or team.get('_id')
+        players = team.get('players') or []
+
+        problems: List[str] = []
+        if not players:
+            problems.append('has no players')
+        elif len(players) < MIN_TEAM_PLAYERS:
+            problems.append(f'only has {len(players)} players')
+
+        player_problems = await asyncio.gather(*[self._verify_player(player) for player in players])
+        problems.extend(problem for problem in player_problems if problem)
+        return VerifiedTeam(team_id, name, len(players), problems)
+
+    async def run(self) -> List[VerifiedTeam]:
+        """Look up every player concurrently and return each team's result, in the order of the tournament."""
+        self.total = len({player['userSlug'] for team in self.tournament
+                          for player in team.get('players') or [] if player.get('userSlug')})
+        await self._report_progress(force=True)
+
+        verified: List[VerifiedTeam] = list(await asyncio.gather(*[self._verify_team(team)
+                                                                   for team in self.tournament]))
+        await self._report_progress(force=True)
+        return verified
+
+    @staticmethod
+    def format_report(verified: List[VerifiedTeam]) -> Tuple[str, List[str]]:
+        """Summarise the results, returning the summary line and a line for each team with problems."""
+        teams_with_problems = [team for team in verified if team.problems]
+        players = sum(team.players for team in verified)
+        summary = f'Checked {len(verified)} teams and {players} players: ' \
+                  f'{len(verified) - len(teams_with_problems)} teams look good'
+        summary += f', {len(teams_with_problems)} need a look 🤔' if teams_with_problems else ' 🎉'
+        return summary, [f"{truncate(team.name, 50, '…')} ({team.team_id}): {'; '.join(team.problems)}"
+                         for team in teams_with_problems]
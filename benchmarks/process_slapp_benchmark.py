@@ -0,0 +1,129 @@
+"""
+Time process_slapp and pagination over Slapp response fixtures, and check that the embeds they produce are unchanged.
+
+Run with:
+    python -m benchmarks.process_slapp_benchmark [--repeat 5]
+After a change that is meant to alter the output, review it and then re-record the golden outputs with:
+    python -m benchmarks.process_slapp_benchmark --update-golden
+
+Synthetic fixtures are generated from a seed, see FIXTURES.
+Captured responses can be added as JSON files in benchmarks/fixtures, one decoded Slapp response per file;
+see benchmarks/fixtures/README.md for how to capture and anonymise them.
+The golden outputs are the paginated embed dictionaries, in benchmarks/golden, one file per fixture.
+The random footer phrase is seeded for each render so that the output is reproducible.
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import timeit
+from typing import Dict, List, Tuple
+
+from PyBot.helpers.embed_helper import paginate_embed
+from benchmarks.synthetic import make_slapp_response
+from slapp_py import slapipes
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCHMARKS_DIR, 'fixtures')
+GOLDEN_DIR = os.path.join(BENCHMARKS_DIR, 'golden')
+
+FIXTURES: Dict[str, Tuple[int, int, int]] = {
+    'players-0': (0, 0, 6),
+    'players-1': (1, 0, 6),
+    'players-20': (20, 0, 6),
+    'players-500': (500, 0, 6),
+    'team-30-players': (0, 1, 30),
+    'teams-20-30-players': (0, 20, 30),
+    'players-3-teams-5': (3, 5, 6),
+}
+"""Synthetic fixtures by name: the number of matched players, matched teams, and players per team."""
+
+
+def load_fixtures() -> Dict[str, dict]:
+    """Load the synthetic fixtures and then any captured responses in FIXTURES_DIR."""
+    fixtures = {name: make_slapp_response(players, teams, players_per_team, seed=i)
+                for i, (name, (players, teams, players_per_team)) in enumerate(FIXTURES.items())}
+
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.json'))):
+        with open(path, 'r', encoding='utf-8') as infile:
+            fixtures['captured-' + os.path.splitext(os.path.basename(path))[0]] = json.load(infile)
+    return fixtures
+
+
+def render(response: dict) -> List[dict]:
+    """Render the response into its pages as dictionaries, as they would be sent."""
+    random.seed(0)
+    builder, _ = slapipes.process_slapp(response)
+    return [page.to_dict() for page in paginate_embed(builder)]
+
+
+def _golden_path(name: str) -> str:
+    return os.path.join(GOLDEN_DIR, f'{name}.json')
+
+
+def check(name: str, pages: List[dict], update_golden: bool) -> bool:
+    """Compare the pages with the fixture's golden output, or record them. Returns if they match."""
+    path = _golden_path(name)
+    if update_golden or not os.path.isfile(path):
+        if not os.path.exists(GOLDEN_DIR):
+            os.makedirs(GOLDEN_DIR)
+        with open(path, 'w', encoding='utf-8') as outfile:
+            json.dump(pages, outfile, indent=1, ensure_ascii=False)
+        print(f'{name}: recorded golden output to {path}')
+        return True
+
+    with open(path, 'r', encoding='utf-8') as infile:
+        golden = json.load(infile)
+    if golden == pages:
+        return True
+
+    print(f'{name}: OUTPUT CHANGED ({len(golden)} golden pages, {len(pages)} pages now)')
+    for i, (golden_page, page) in enumerate(zip(golden, pages)):
+        if golden_page != page:
+            print(f'  First difference is on page {i + 1}:\n  golden: {json.dumps(golden_page)[:500]}\n'
+                  f'     now: {json.dumps(page)[:500]}')
+            break
+    return False
+
+
+def run(repeat: int, update_golden: bool) -> bool:
+    all_match = True
+    print(f'{"fixture":>24}  {"cold render":>12}  {"warm render":>12}  {"paginate":>10}  pages')
+    for name, response in load_fixtures().items():
+        slapipes.render_cache.clear()
+        pages = render(response)
+        warm_pages = render(response)
+        if warm_pages != pages:
+            print(f'{name}: the cached render differs from the cold render')
+            all_match = False
+        all_match = check(name, pages, update_golden) and all_match
+
+        def cold():
+            slapipes.render_cache.clear()
+            slapipes.process_slapp(response)
+
+        builder, _ = slapipes.process_slapp(response)
+        cold_s = min(timeit.repeat(cold, repeat=repeat, number=1))
+        warm_s = min(timeit.repeat(lambda: slapipes.process_slapp(response), repeat=repeat, number=1))
+        paginate_s = min(timeit.repeat(lambda: paginate_embed(builder), repeat=repeat, number=1))
+        print(f'{name:>24}  {cold_s * 1000:10.2f}ms  {warm_s * 1000:10.2f}ms  {paginate_s * 1000:8.2f}ms  {len(pages)}')
+    return all_match
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark process_slapp and check its output against golden files.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of repeats; the best is kept.')
+    parser.add_argument('--update-golden', action='store_true', help='Re-record the golden outputs.')
+    args = parser.parse_args(argv)
+
+    if run(args.repeat, args.update_golden):
+        return 0
+    print('The embed output has changed. If this is intended, re-run with --update-golden.')
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,133 @@
+"""
+Benchmark the core_classes serialisation roundtrips and SlappResponseObject construction
+against a synthetic snapshot sized like production.
+
+Run with:
+    python -m benchmarks.serialisation_benchmark [--scale 0.1] [--repeat 3]
+Compare two runs with:
+    python -m benchmarks.serialisation_benchmark --compare <before.json> <after.json>
+
+Results are saved as JSON in benchmarks/results, named by time and commit.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from benchmarks.synthetic import make_snapshot, make_slapp_response, PRODUCTION_SNAPSHOT_SIZES
+from core_classes.bracket import Bracket
+from core_classes.player import Player
+from core_classes.source import Source
+from core_classes.team import Team
+from slapp_py.slapp_response_object import SlappResponseObject
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              encoding='utf-8', check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _time(func: Callable[[], object], items: int, repeat: int) -> Dict[str, float]:
+    best = min(timeit.repeat(func, repeat=repeat, number=1))
+    return {"items": items, "best_s": best, "per_item_us": (best / max(1, items)) * 1_000_000}
+
+
+def run(scale: float, repeat: int) -> dict:
+    print(f'Generating synthetic snapshot at {scale=} of {PRODUCTION_SNAPSHOT_SIZES} ...')
+    player_dicts, team_dicts, source_dicts = make_snapshot(scale)
+    bracket_dicts = [bracket for source in source_dicts for bracket in source.get("Brackets", [])]
+
+    players = [Player.from_dict(d) for d in player_dicts]
+    teams = [Team.from_dict(d) for d in team_dicts]
+    sources = [Source.from_dict(d) for d in source_dicts]
+    brackets = [Bracket.from_dict(d) for d in bracket_dicts]
+
+    cases: Dict[str, Dict[str, float]] = {}
+
+    def case(name: str, func: Callable[[], object], items: int):
+        cases[name] = _time(func, items, repeat)
+        print(f'{name:>32}: {cases[name]["best_s"] * 1000:10.2f} ms '
+              f'({cases[name]["per_item_us"]:.2f} µs/item over {items} items)')
+
+    case('Player.from_dict', lambda: [Player.from_dict(d) for d in player_dicts], len(player_dicts))
+    case('Player.to_dict', lambda: [p.to_dict() for p in players], len(players))
+    case('Team.from_dict', lambda: [Team.from_dict(d) for d in team_dicts], len(team_dicts))
+    case('Team.to_dict', lambda: [t.to_dict() for t in teams], len(teams))
+    case('Source.from_dict', lambda: [Source.from_dict(d) for d in source_dicts], len(source_dicts))
+    case('Source.to_dict', lambda: [s.to_dict() for s in sources], len(sources))
+    case('Bracket.from_dict', lambda: [Bracket.from_dict(d) for d in bracket_dicts], len(bracket_dicts))
+    case('Bracket.to_dict', lambda: [b.to_dict() for b in brackets], len(brackets))
+
+    for players_count, teams_count in ((1, 0), (20, 5), (500, 20), (5, 200)):
+        response = make_slapp_response(players=players_count, teams=teams_count)
+        case(f'SlappResponseObject({players_count}p, {teams_count}t)',
+             lambda: SlappResponseObject(response), 1)
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "repeat": repeat,
+        "sizes": {"players": len(player_dicts), "teams": len(team_dicts),
+                  "sources": len(source_dicts), "brackets": len(bracket_dicts)},
+        "cases": cases,
+    }
+
+
+def save(results: dict) -> str:
+    if not os.path.exists(RESULTS_DIR):
+        os.makedirs(RESULTS_DIR)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y-%m-%d-%H-%M-%S')}-{results['commit']}.json")
+    with open(path, 'w', encoding='utf-8') as outfile:
+        json.dump(results, outfile, indent=2, ensure_ascii=False)
+    return path
+
+
+def compare(before_path: str, after_path: str):
+    with open(before_path, 'r', encoding='utf-8') as infile:
+        before = json.load(infile)
+    with open(after_path, 'r', encoding='utf-8') as infile:
+        after = json.load(infile)
+
+    if before.get("sizes") != after.get("sizes"):
+        print(f'Warning: the runs used different sizes ({before.get("sizes")} vs {after.get("sizes")})')
+
+    print(f'{"case":>32}  {before["commit"]:>10}  {after["commit"]:>10}  change')
+    for name in after["cases"]:
+        if name not in before["cases"]:
+            continue
+        old = before["cases"][name]["best_s"] * 1000
+        new = after["cases"][name]["best_s"] * 1000
+        print(f'{name:>32}  {old:8.2f}ms  {new:8.2f}ms  {((new - old) / old) * 100 if old else 0:+.1f}%')
+
+
+def main(argv: List[str]):
+    parser = argparse.ArgumentParser(description='Benchmark core_classes serialisation roundtrips.')
+    parser.add_argument('--scale', type=float, default=0.1, help='Fraction of the production snapshot size to use.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of repeats; the best is kept.')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='Compare two saved results.')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        path = save(run(args.scale, args.repeat))
+        print(f'Saved results to {path}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,39 @@
+"""
+Benchmark building and rendering a team-heavy Slapp response.
+Run with: python -m benchmarks.slapp_response_benchmark
+"""
+
+import timeit
+
+from benchmarks.synthetic import make_slapp_response
+from slapp_py.slapipes import process_slapp
+from slapp_py.slapp_response_object import SlappResponseObject
+
+REPEATS = 5
+NUMBER = 3
+
+
+def _report(label: str, timings: list):
+    best = min(timings) / NUMBER
+    print(f'{label}: best of {REPEATS} = {best * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    response = make_slapp_response(players=5, teams=200, players_per_team=8)
+    print(f"Team-heavy response: {len(response['Players'])} players, {len(response['Teams'])} teams, "
+          f"{len(response['AdditionalTeams'])} additional teams, {len(response['Sources'])} sources")
+
+    _report('SlappResponseObject', timeit.repeat(lambda: SlappResponseObject(response), repeat=REPEATS, number=NUMBER))
+
+    r = SlappResponseObject(response)
+
+    def _lookups():
+        for t in r.matched_teams:
+            for player in r.get_players_in_team(t.guid):
+                for team_id in player.teams:
+                    r.known_teams.get(team_id)
+                for source_id in player.sources:
+                    r.sources.get(source_id)
+
+    _report('Team/source lookups', timeit.repeat(_lookups, repeat=REPEATS, number=NUMBER))
+    _report('process_slapp', timeit.repeat(lambda: process_slapp(response), repeat=REPEATS, number=NUMBER))
@@ -0,0 +1,50 @@
+"""
+Benchmark attempt_link_source over every source name in a Sources snapshot.
+Run with: python -m benchmarks.source_link_benchmark [path/to/Snapshot-Sources-*.json]
+Without a path, synthetic source names are used.
+"""
+
+import json
+import sys
+import timeit
+from typing import List
+
+from benchmarks.synthetic import SyntheticData
+from core_classes.source_metadata import parse_source_name
+from slapp_py.strings import attempt_link_source
+
+REPEATS = 5
+SYNTHETIC_SOURCES = 1600
+
+
+def _load_source_names(argv: List[str]) -> List[str]:
+    if argv:
+        print(f'Loading sources from {argv[0]}')
+        with open(argv[0], 'r', encoding='utf-8') as infile:
+            return [source.get("Name", "") for source in json.load(infile)]
+    else:
+        print(f'No snapshot specified, using {SYNTHETIC_SOURCES} synthetic source names.')
+        data = SyntheticData()
+        return [data.source_name() for _ in range(SYNTHETIC_SOURCES)]
+
+
+def _link_all(names: List[str]):
+    for name in names:
+        attempt_link_source(name)
+
+
+def _link_all_cold(names: List[str]):
+    parse_source_name.cache_clear()
+    attempt_link_source.cache_clear()
+    _link_all(names)
+
+
+if __name__ == '__main__':
+    source_names = _load_source_names(sys.argv[1:])
+    linked = sum(1 for name in source_names if attempt_link_source(name).startswith('['))
+    print(f'{len(source_names)} sources, {linked} linked to Battlefy.')
+
+    cold = min(timeit.repeat(lambda: _link_all_cold(source_names), repeat=REPEATS, number=1))
+    warm = min(timeit.repeat(lambda: _link_all(source_names), repeat=REPEATS, number=1))
+    print(f'Cold (memo cleared): {cold * 1000:.2f} ms ({cold / max(1, len(source_names)) * 1_000_000:.2f} µs/source)')
+    print(f'Warm (memoised):     {warm * 1000:.2f} ms ({warm / max(1, len(source_names)) * 1_000_000:.2f} µs/source)')
@@ -0,0 +1,172 @@
+"""
+Synthetic Slapp data for the benchmarks.
+Everything is generated from a seeded random so that runs are reproducible across commits.
+"""
+
+import random
+from typing import List, Dict, Optional, Tuple
+from uuid import UUID
+
+DIV_TYPES = ['LUTI', 'EBTV', 'DSB']
+SEASONS = ['S8', 'S9', 'S10', 'S11']
+ORGANISATION_SLUGS = ['low-ink', 'swim-or-sink', 'inktv-open', 'sitback-saturdays', 'area-cup', 'turtlement']
+BRACKET_NAMES = ['Swiss', 'Alpha', 'Beta', 'Gamma', 'Top Cut']
+
+PRODUCTION_SNAPSHOT_SIZES = {"players": 40000, "teams": 16000, "sources": 1600, "brackets_per_source": 3}
+"""Approximate size of the production Players and Sources snapshots, for scaling the synthetic snapshot."""
+
+
+class SyntheticData:
+    def __init__(self, seed: int = 0):
+        self.rng = random.Random(seed)
+
+    def uuid(self) -> str:
+        return str(UUID(int=self.rng.getrandbits(128), version=4))
+
+    def battlefy_id(self) -> str:
+        return '%024x' % self.rng.getrandbits(96)
+
+    def name(self, prefix: str) -> dict:
+        return {"Value": f'{prefix} {self.rng.randint(0, 99999)}'}
+
+    def division(self) -> dict:
+        return {"Value": self.rng.randint(1, 9),
+                "DivType": self.rng.choice(DIV_TYPES),
+                "Season": self.rng.choice(SEASONS)}
+
+    def source_name(self) -> str:
+        return f'20{self.rng.randint(18, 21)}-{self.rng.randint(1, 12):02}-{self.rng.randint(1, 28):02}-' \
+               f'{self.rng.choice(ORGANISATION_SLUGS)}-{self.rng.randint(1, 99)}-{self.battlefy_id()}'
+
+    def source_ids(self, sources: List[str], count: int) -> List[str]:
+        return self.rng.sample(sources, min(count, len(sources)))
+
+    def player(self, sources: List[str], teams: List[str], guid: Optional[str] = None) -> dict:
+        player_sources = self.source_ids(sources, self.rng.randint(1, 6))
+        result = {
+            "Id": guid or self.uuid(),
+            "Names": [self.name('Player') for _ in range(self.rng.randint(1, 3))],
+            "S": player_sources,
+            "Teams": self.rng.sample(teams, min(len(teams), self.rng.randint(1, 3))),
+            "Battlefy": {"Slugs": [{"Value": f'player{self.rng.randint(0, 99999)}', "S": player_sources[:1]}]},
+            "Skill": {"μ": self.rng.uniform(15, 35), "σ": self.rng.uniform(1, 8.3)},
+        }
+        if self.rng.random() < 0.3:
+            result["Twitter"] = [{"Value": f'@player{self.rng.randint(0, 99999)}', "S": player_sources[:1]}]
+        if self.rng.random() < 0.1:
+            result["Top500"] = True
+        return result
+
+    def team(self, sources: List[str], guid: Optional[str] = None) -> dict:
+        team_sources = self.source_ids(sources, self.rng.randint(1, 6))
+        return {
+            "Id": guid or self.uuid(),
+            "Names": [self.name('Team') for _ in range(self.rng.randint(1, 2))],
+            "ClanTags": [{"Value": f'Ω{self.rng.randint(0, 99)}', "S": team_sources[:1], "LayoutOption": "Front"}],
+            "Divisions": [self.division() for _ in range(self.rng.randint(0, 3))],
+            "BattlefyPersistentTeamIds": [{"Value": self.battlefy_id(), "S": team_sources[:1]}],
+            "S": team_sources,
+        }
+
+    def bracket(self, player_ids: List[str], team_ids: List[str], games: int = 8) -> dict:
+        """Make a bracket for the players, in teams of 4 sampled from team_ids."""
+        team_ids = self.rng.sample(team_ids, min(len(team_ids), max(2, len(player_ids) // 4)))
+        ranks: Dict[str, List[str]] = {}
+        for i, player_id in enumerate(player_ids):
+            ranks.setdefault(str(i // 4 + 1), []).append(player_id)
+        matches = []
+        for _ in range(games):
+            team1, team2 = self.rng.sample(team_ids, 2)
+            matches.append({
+                "Score": {"Points": [self.rng.randint(0, 3), self.rng.randint(0, 3)]},
+                "Ids": {team1: self.rng.sample(player_ids, min(4, len(player_ids))),
+                        team2: self.rng.sample(player_ids, min(4, len(player_ids)))}
+            })
+        return {
+            "Name": self.rng.choice(BRACKET_NAMES),
+            "Matches": matches,
+            "Placements": {"PlayersByPlacement": ranks,
+                           "TeamsByPlacement": {str(i + 1): [team_id] for i, team_id in enumerate(team_ids)}}
+        }
+
+    def source(self, player_ids: List[str], team_ids: List[str], brackets: int, guid: Optional[str] = None) -> dict:
+        return {
+            "Id": guid or self.uuid(),
+            "Name": self.source_name(),
+            "Brackets": [self.bracket(self.rng.sample(player_ids, min(32, len(player_ids))), team_ids)
+                         for _ in range(brackets)],
+            "Uris": [f'https://battlefy.com/{self.rng.choice(ORGANISATION_SLUGS)}//{self.battlefy_id()}/info'],
+            "Start": self.rng.randint(1514764800, 1640995200),
+        }
+
+    def snapshot(self,
+                 players: int,
+                 teams: int,
+                 sources: int,
+                 brackets_per_source: int = 3) -> Tuple[List[dict], List[dict], List[dict]]:
+        """
+        Make a snapshot of the given size, as serialised in the Snapshot files.
+        Returns a tuple of (players, teams, sources) dictionaries.
+        """
+        source_ids = [self.uuid() for _ in range(max(1, sources))]
+        team_ids = [self.uuid() for _ in range(max(2, teams))]
+        player_dicts = [self.player(source_ids, team_ids) for _ in range(players)]
+        player_ids = [player["Id"] for player in player_dicts] or [self.uuid()]
+        team_dicts = [self.team(source_ids, team_id) for team_id in team_ids]
+        source_dicts = [self.source(player_ids, team_ids, brackets_per_source, source_id) for source_id in source_ids]
+        return player_dicts, team_dicts, source_dicts
+
+    def slapp_response(self,
+                       players: int,
+                       teams: int,
+                       players_per_team: int = 6,
+                       sources: int = 50,
+                       query: str = 'synthetic') -> dict:
+        """
+        Make a Slapp response dictionary with the given number of matched players and teams.
+        Matched teams are given players_per_team players each, as Slapp would return with PlayersForTeams.
+        """
+        source_ids = [self.uuid() for _ in range(max(1, sources))]
+        additional_team_ids = [self.uuid() for _ in range(max(2, players // 2))]
+        matched_team_ids = [self.uuid() for _ in range(teams)]
+        all_team_ids = additional_team_ids + matched_team_ids
+
+        matched_players = [self.player(source_ids, all_team_ids) for _ in range(players)]
+        players_for_teams = {
+            team_id: [{"Item1": self.player(source_ids, [team_id] + self.rng.sample(additional_team_ids, 1)),
+                       "Item2": True} for _ in range(players_per_team)]
+            for team_id in matched_team_ids
+        }
+
+        placements_for_players = {}
+        for player in matched_players:
+            placements_for_players[player["Id"]] = {
+                source_id: [self.bracket([player["Id"]] + [self.uuid() for _ in range(15)], all_team_ids)
+                            for _ in range(self.rng.randint(1, 2))]
+                for source_id in player["S"][:3]
+            }
+
+        return {
+            "Message": "OK",
+            "Query": query,
+            "Players": matched_players,
+            "Teams": [self.team(source_ids, team_id) for team_id in matched_team_ids],
+            "AdditionalTeams": {team_id: self.team(source_ids, team_id) for team_id in additional_team_ids},
+            "PlayersForTeams": players_for_teams,
+            "Sources": {source_id: self.source_name() for source_id in source_ids},
+            "PlacementsForPlayers": placements_for_players,
+        }
+
+
+def make_slapp_response(players: int, teams: int, players_per_team: int = 6, seed: int = 0) -> dict:
+    """Make a reproducible synthetic Slapp response."""
+    return SyntheticData(seed).slapp_response(players, teams, players_per_team)
+
+
+def make_snapshot(scale: float = 1.0, seed: int = 0) -> Tuple[List[dict], List[dict], List[dict]]:
+    """Make a reproducible synthetic snapshot, sized as the production snapshot multiplied by scale."""
+    return SyntheticData(seed).snapshot(
+        players=max(1, int(PRODUCTION_SNAPSHOT_SIZES["players"] * scale)),
+        teams=max(2, int(PRODUCTION_SNAPSHOT_SIZES["teams"] * scale)),
+        sources=max(1, int(PRODUCTION_SNAPSHOT_SIZES["sources"] * scale)),
+        brackets_per_source=PRODUCTION_SNAPSHOT_SIZES["brackets_per_source"])
@@ -1,4 +1,5 @@
-from typing import Union, Optional
+from functools import lru_cache
+from typing import Union, Optional, Tuple
 
 from helpers.str_helper import equals_ignore_case
 
@@ -9,39 +10,55 @@ DIVISION_X_PLUS = -1
 
 
 class Division:
-    value: int
-    div_type: str
-    season: str
+    """
+    A team's division. Divisions are immutable so that parsed instances can be shared, see Division.from_dict.
+    """
+
+    __slots__ = ('_value', '_div_type', '_season', '_normalised_value')
 
     def __init__(self,
                  value: Union[int, str, None] = DIVISION_UNKNOWN_VAL,
                  div_type: Optional[str] = DIVISION_UNKNOWN_STR,
                  season: Optional[str] = ""):
         """Constructor for Division"""
-        self.div_type = div_type or DIVISION_UNKNOWN_STR
-        self.season = season or ""
+        self._div_type: str = div_type or DIVISION_UNKNOWN_STR
+        self._season: str = season or ""
 
         if isinstance(value, str):
             if value == '':
-                self.value = DIVISION_UNKNOWN_VAL
+                self._value: int = DIVISION_UNKNOWN_VAL
             elif value.isnumeric():
-                self.value = int(value)
+                self._value = int(value)
             elif equals_ignore_case(value, 'X+'):
-                self.value = DIVISION_X_PLUS
+                self._value = DIVISION_X_PLUS
             elif equals_ignore_case(value, 'X'):
-                self.value = DIVISION_X
+                self._value = DIVISION_X
             elif (len(value) > 2) and value[0:3].isnumeric():
-                self.value = int(value[0:3])
+                self._value = int(value[0:3])
             elif (len(value) > 1) and value[0:2].isnumeric():
-                self.value = int(value[0:2])
+                self._value = int(value[0:2])
             elif value[0:1].isnumeric():
-                self.value = int(value[0:1])
+                self._value = int(value[0:1])
             else:
-                self.value = DIVISION_UNKNOWN_VAL
+                self._value = DIVISION_UNKNOWN_VAL
         elif isinstance(value, int):
-            self.value = value
+            self._value = value
         else:
-            self.value = DIVISION_UNKNOWN_VAL
+            self._value = DIVISION_UNKNOWN_VAL
+
+        self._normalised_value: int = self._calculate_normalised_value()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    @property
+    def div_type(self) -> str:
+        return self._div_type
+
+    @property
+    def season(self) -> str:
+        return self._season
 
     @property
     def name(self) -> str:
@@ -54,6 +71,10 @@ class Division:
 
     @property
     def normalised_value(self) -> int:
+        """The division value on a common scale across the div types, where lower is better. Calculated once."""
+        return self._normalised_value
+
+    def _calculate_normalised_value(self) -> int:
         if self.div_type == 'LUTI':
             return self.value
         elif self.div_type == 'EBTV':
@@ -77,28 +98,52 @@ class Division:
             value_str = switch.get(self.value, str(self.value))
             return f'{self.div_type} {self.season} Div {value_str}'
 
-    def __cmp__(self, other):
+    def _other_normalised_value(self, other) -> int:
         if isinstance(other, Division):
-            return self.normalised_value.__cmp__(other.normalised_value)
+            return other.normalised_value
         else:
             raise TypeError(f'Cannot compare a Division to a non-Division type: {other}')
 
+    def _key(self) -> Tuple[int, str, str]:
+        return self._value, self._div_type, self._season
+
+    def __eq__(self, other):
+        return isinstance(other, Division) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
     def __lt__(self, other):
-        return self.__cmp__(other) == -1
+        return self.normalised_value < self._other_normalised_value(other)
+
+    def __le__(self, other):
+        return self.normalised_value <= self._other_normalised_value(other)
+
+    def __gt__(self, other):
+        return self.normalised_value > self._other_normalised_value(other)
+
+    def __ge__(self, other):
+        return self.normalised_value >= self._other_normalised_value(other)
 
     @staticmethod
     def from_dict(obj: dict) -> 'Division':
+        """Get the Division for the dictionary. Equal dictionaries give the same (interned) Division instance."""
         assert isinstance(obj, dict)
-        value = obj.get("Value", DIVISION_UNKNOWN_VAL)
-        if isinstance(value, str):
-            value = int(value)
-        div_type = obj.get("DivType", DIVISION_UNKNOWN_STR)
-        season = obj.get("Season", '')
-        return Division(value, div_type, season)
+        return _parse_division(obj.get("Value", DIVISION_UNKNOWN_VAL),
+                               obj.get("DivType", DIVISION_UNKNOWN_STR),
+                               obj.get("Season", ''))
 
     def to_dict(self) -> dict:
         result: dict = {"Value": self.value, "DivType": self.div_type, "Season": self.season}
         return result
 
 
+@lru_cache(maxsize=4096)
+def _parse_division(value: Union[int, str, None], div_type: Optional[str], season: Optional[str]) -> Division:
+    """Parse cache for Division.from_dict, keyed by the serialised Value, DivType and Season."""
+    if isinstance(value, str):
+        value = int(value)
+    return Division(value, div_type, season)
+
+
 Unknown = Division()
@@ -9,6 +9,7 @@ from core_classes.skill import Skill
 from core_classes.socials.sendou import Sendou
 from core_classes.socials.twitch import Twitch
 from core_classes.socials.twitter import Twitter
+from core_classes.top_placement import TopPlacement
 from helpers.dict_helper import from_list, to_list, deserialize_uuids, serialize_uuids
 
 
@@ -47,6 +48,10 @@ class Player:
     top500: bool
     """Back-store for player's top 500 flag."""
 
+    top_placements: List[TopPlacement]
+    """The player's precomputed high finishes, see misc/placements_to_players.
+    Optional: empty if not computed, or if Slapp didn't pass TopPlacements through in the player's dict."""
+
     twitch_profiles: List[Twitch]
     """Back-store for the Twitch Profiles of this player."""
 
@@ -73,6 +78,7 @@ class Player:
                  weapons: Optional[List[str]] = None,
                  country: Optional[str] = None,
                  top500: bool = False,
+                 top_placements: Optional[List[TopPlacement]] = None,
                  guid: Union[None, str, UUID] = None):
 
         if not sources:
@@ -115,6 +121,7 @@ class Player:
         self.weapons = weapons or []
         self.country = country.upper() if country and len(country) == 2 else None
         self.top500 = top500
+        self.top_placements = top_placements or []
 
         if isinstance(guid, str):
             guid = UUID(guid)
@@ -153,6 +160,7 @@ class Player:
             weapons=from_list(lambda x: str(x), obj.get("Weapons")),
             country=obj.get("Country", None),
             top500=obj.get("Top500", False),
+            top_placements=from_list(lambda x: TopPlacement.from_dict(x), obj.get("TopPlacements")),
             guid=UUID(obj.get("Id"))
         )
 
@@ -172,13 +180,15 @@ class Player:
         if len(self.sendou_profiles) > 0:
             result["Sendou"] = to_list(lambda x: Sendou.to_dict(x), self.sendou_profiles)
         if not self.skill.is_default:
-            result["Skill"] = self.skill.to_dict(),
+            result["Skill"] = self.skill.to_dict()
         if len(self.sources) > 0:
             result["S"] = serialize_uuids(self.sources)
         if len(self.teams) > 0:
             result["Teams"] = serialize_uuids(self.teams)
         if self.top500:
             result["Top500"] = self.top500
+        if len(self.top_placements) > 0:
+            result["TopPlacements"] = to_list(lambda x: TopPlacement.to_dict(x), self.top_placements)
         if len(self.twitch_profiles) > 0:
             result["Twitch"] = to_list(lambda x: Twitch.to_dict(x), self.twitch_profiles)
         if len(self.twitter_profiles) > 0:
@@ -1,3 +1,4 @@
+from math import sqrt, exp
 from typing import Optional, Iterable, List, Tuple
 
 import trueskill
@@ -147,6 +148,33 @@ class Skill:
                                                            Skill._get_maximum_clout_team_rating_group(team2)])
         return int(favouring_team1 * 100), int(favouring_team2 * 100)
 
+    @staticmethod
+    def quality_matrix(teams: List[Iterable['Skill']]) -> List[List[Optional[Tuple[int, int]]]]:
+        """
+        Calculate the quality of the game for every pairing of the teams, as calculate_quality_of_game_teams does.
+        Each team's best and worst roster is summarised once, and each pairing then takes constant time.
+        Every team must have at least one Skill.
+
+        Returns a square matrix where [i][j] is calculate_quality_of_game_teams(teams[i], teams[j]).
+        The diagonal is None.
+        """
+        maximum_sums = []
+        minimum_sums = []
+        for team in teams:
+            team = list(team)
+            maximum_sums.append(_rating_sums(Skill._get_maximum_clout_team_skills(team)))
+            minimum_sums.append(_rating_sums(Skill._get_minimum_clout_team_skills(team)))
+
+        beta_squared = global_env().beta ** 2
+        matrix: List[List[Optional[Tuple[int, int]]]] = [[None] * len(teams) for _ in teams]
+        for i in range(len(teams)):
+            for j in range(i + 1, len(teams)):
+                favouring_i = _two_team_quality(maximum_sums[i], minimum_sums[j], beta_squared)
+                favouring_j = _two_team_quality(minimum_sums[i], maximum_sums[j], beta_squared)
+                matrix[i][j] = (int(favouring_i * 100), int(favouring_j * 100))
+                matrix[j][i] = (int(favouring_j * 100), int(favouring_i * 100))
+        return matrix
+
     @staticmethod
     def _get_minimum_clout_team_skills(team_players_skills: Iterable['Skill']) -> List['Skill']:
         """Filter the incoming Skills iterable to feature the 4 worst and return as a list."""
@@ -214,3 +242,20 @@ class Skill:
 def _as_rating_groups(skills: Iterable[Skill]) -> tuple:
     """Transform an iterable of skills into rating tuples for use in the trueskill module."""
     return tuple([skill.rating for skill in skills])
+
+
+def _rating_sums(skills: Iterable[Skill]) -> Tuple[float, float, int]:
+    """Sum the means and variances of the skills' ratings. Returns (sum of mu, sum of sigma squared, count)."""
+    ratings = [skill.rating for skill in skills]
+    return sum(r.mu for r in ratings), sum(r.sigma ** 2 for r in ratings), len(ratings)
+
+
+def _two_team_quality(team1: Tuple[float, float, int], team2: Tuple[float, float, int], beta_squared: float) -> float:
+    """
+    The closed form of trueskill.quality for two teams of unweighted players, from the teams' _rating_sums.
+    The draw probability is the density of the teams' performance difference at zero, relative to a perfect match.
+    """
+    mu_1, variance_1, count_1 = team1
+    mu_2, variance_2, count_2 = team2
+    denominator = (count_1 + count_2) * beta_squared + variance_1 + variance_2
+    return sqrt((count_1 + count_2) * beta_squared / denominator) * exp(-((mu_1 - mu_2) ** 2) / (2 * denominator))
@@ -4,6 +4,7 @@ from uuid import UUID, uuid4
 
 from core_classes.bracket import Bracket
 from core_classes.player import Player
+from core_classes.source_metadata import SourceMetadata, parse_source_name
 from core_classes.team import Team
 from helpers.dict_helper import to_list, from_list
 
@@ -38,6 +39,11 @@ class Source:
     def __str__(self):
         return self.name
 
+    @property
+    def metadata(self) -> SourceMetadata:
+        """The date, organiser, slug, and id encoded in the Source's name."""
+        return parse_source_name(self.name)
+
     @staticmethod
     def deserialize_uuids(info: dict, key: str = "S") -> List[UUID]:
         sources: List[UUID] = []
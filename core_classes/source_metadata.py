@@ -0,0 +1,119 @@
+import re
+from datetime import date
+from functools import lru_cache
+from typing import NamedTuple, Optional, Dict, List
+
+PLATFORM_BATTLEFY = 'battlefy'
+PLATFORM_LUTI = 'luti'
+PLATFORM_SENDOU = 'sendou'
+PLATFORM_STATINK = 'statink'
+PLATFORM_TWITTER = 'twitter'
+PLATFORM_UNKNOWN = 'unknown'
+
+ORGANISER_TOURNAMENTS: Dict[str, List[str]] = {
+    'inkling-performance-labs': ['-low-ink-', '-testing-grounds-', '-swim-or-sink-'],
+    'inktv': ['-bns-', '-swl-winter-snowflake-', '-splatoon-world-league-',
+              '-inktv-open-', '-extrafaganza-', '-inkvitational-'],
+    'sitback-saturdays': ['-sitback-saturdays-'],
+    'splatoon2': ['-splatoon-2-north-american-online-open-'],
+    'squidboards-splatoon-2-community-events': ['-sqss-', '-squidboards-splat-series-'],
+    'squid-spawning-grounds': ['-squid-spawning-grounds-'],
+    'fresh-start-cup': ['-fresh-start-cup-'],
+    'swift-second-saturdays': ['-sss-'],
+    'gamesetmatch': ['-gsm-'],
+    'area-cup': ['-area-cup-'],
+    'asquidmin': ['-turtlement-'],
+}
+"""Battlefy organisation slugs keyed to the tournament name fragments that they run."""
+
+_TOURNAMENT_ORGANISERS: Dict[str, str] = {tournament: organiser
+                                          for organiser, tournaments in ORGANISER_TOURNAMENTS.items()
+                                          for tournament in tournaments}
+
+_TOURNAMENT_PATTERN = re.compile('|'.join(
+    re.escape(tournament) for tournament in sorted(_TOURNAMENT_ORGANISERS, key=len, reverse=True)))
+"""Matches any of the known tournament name fragments in one pass."""
+
+SOURCE_ID_PATTERN = re.compile("-+([0-9a-fA-F]+)$")
+"""Matches the id at the end of a source name."""
+
+BATTLEFY_ID_PATTERN = re.compile("^[0-9a-fA-F]{20,29}$")
+"""Matches a Battlefy id. These are expected to be 24 hex characters but we allow a little leeway."""
+
+_DATE_PATTERN = re.compile(r"^(\d{4})-(\d{2})-(\d{2})-?")
+
+
+class SourceMetadata(NamedTuple):
+    """
+    The information encoded in a Source name, which is in the form {date}-{tournament slug}-{id}.
+    Use parse_source_name rather than constructing this directly so that the parse is shared.
+    """
+
+    name: str
+    """The full Source name."""
+
+    title: str
+    """The Source name without its trailing id."""
+
+    date: Optional[date]
+    """The date at the start of the name, if any."""
+
+    slug: str
+    """The tournament slug, i.e. the name without its date or trailing id."""
+
+    organiser: Optional[str]
+    """The Battlefy organisation slug that runs the tournament, if known."""
+
+    battlefy_id: Optional[str]
+    """The Battlefy tournament id, if this is a Battlefy Source."""
+
+    platform: str
+    """Where the Source came from, one of the PLATFORM_ constants."""
+
+
+def _platform_of(name: str, has_battlefy_id: bool) -> str:
+    if '-stat.ink-' in name:
+        return PLATFORM_STATINK
+    elif '-LUTI-' in name:
+        return PLATFORM_LUTI
+    elif 'Twitter-' in name:
+        return PLATFORM_TWITTER
+    elif 'Sendou' in name:
+        return PLATFORM_SENDOU
+    elif has_battlefy_id:
+        return PLATFORM_BATTLEFY
+    else:
+        return PLATFORM_UNKNOWN
+
+
+@lru_cache(maxsize=8192)
+def parse_source_name(name: str) -> SourceMetadata:
+    """Parse the Source name into its SourceMetadata. Results are memoised by name."""
+    id_match = SOURCE_ID_PATTERN.search(name)
+    title = name[:id_match.start()] if id_match else name
+
+    date_match = _DATE_PATTERN.match(title)
+    source_date = None
+    if date_match:
+        try:
+            source_date = date(int(date_match.group(1)), int(date_match.group(2)), int(date_match.group(3)))
+        except ValueError:
+            date_match = None
+    slug = title[date_match.end():] if date_match else title
+
+    # The id may have been split from the name with more than one hyphen, so take it from after the last.
+    possible_id = name.rpartition('-')[2]
+    has_battlefy_id = BATTLEFY_ID_PATTERN.match(possible_id) is not None
+    platform = _platform_of(name, has_battlefy_id)
+    battlefy_id = possible_id if platform == PLATFORM_BATTLEFY else None
+
+    tournament_match = _TOURNAMENT_PATTERN.search(name)
+    organiser = _TOURNAMENT_ORGANISERS[tournament_match.group(0)] if tournament_match else None
+
+    return SourceMetadata(name=name,
+                          title=title,
+                          date=source_date,
+                          slug=slug,
+                          organiser=organiser,
+                          battlefy_id=battlefy_id,
+                          platform=platform)
@@ -1,4 +1,4 @@
-from typing import Optional, List, Union, Dict
+from typing import Optional, List, Union, Dict, Mapping, Iterable, Callable
 from uuid import UUID, uuid4
 
 from core_classes import division
@@ -139,22 +139,48 @@ class Team:
             result["Twitter"] = to_list(lambda x: Twitter.to_dict(x), self.twitter_profiles)
         return result
 
+    @staticmethod
+    def best_known_division(team_ids: Iterable[UUID], known_teams: Mapping[UUID, 'Team']) -> Optional[Division]:
+        """Get the highest known current division of the specified teams, or None if none are known."""
+        best: Optional[Division] = None
+        for team_id in team_ids:
+            known_team = known_teams.get(team_id)
+            if known_team is not None \
+                    and not known_team.current_div.is_unknown \
+                    and (best is None or known_team.current_div < best):
+                best = known_team.current_div
+        return best
+
     @staticmethod
     def best_team_player_div_string(
             team: 'Team',
             players_for_team: List[Dict[str, Union[dict, object, bool]]],
-            known_teams: Dict[str, 'Team']):
-        if not players_for_team or not known_teams:
+            known_teams: Mapping[UUID, 'Team'],
+            division_for_player: Optional[Callable[[object], Optional[Division]]] = None) -> str:
+        """
+        Describe the highest division that a current player of the team has played at, compared to the team's.
+
+        :param team: The team to describe
+        :param players_for_team: The Item1 (Player or Player dict) and Item2 (is in team) dictionaries for the team
+        :param known_teams: The teams that the players have played for, keyed by id
+        :param division_for_player: Optional function giving the highest division of a player from a precomputed
+            ranking, e.g. SlappResponseObject.best_division_for_player. If not specified, known_teams is searched.
+        :return: The description or empty if the divisions are not known.
+        """
+        if not players_for_team or team.current_div.is_unknown:
+            return ''
+
+        if division_for_player is None and not known_teams:
             return ''
 
         from core_classes.player import Player
-        highest_div: Division = team.current_div
+        highest_div: Optional[Division] = None
         best_player: Optional[Player] = None
         for player_tuple in players_for_team:
             if player_tuple:
                 in_team = player_tuple["Item2"] if "Item2" in player_tuple else False
                 p: Union[dict, Player] = player_tuple["Item1"] if "Item1" in player_tuple else None
-                if p is None:
+                if p is None or not in_team:
                     continue
                 elif isinstance(p, dict):
                     p: Player = Player.from_dict(p)
@@ -163,18 +189,18 @@ class Team:
                 else:
                     assert False, f"Unknown Player object {p}"
 
-                if in_team and len(p.teams) > 0:
-                    for team_id in p.teams:
-                        player_team = known_teams[team_id.__str__()] if known_teams and team_id in known_teams else None
-                        if (player_team is not None) \
-                                and (not player_team.current_div.is_unknown) \
-                                and (highest_div.is_unknown or (player_team.current_div < highest_div)):
-                            highest_div = player_team.current_div
-                            best_player = p
+                if division_for_player is not None:
+                    player_div = division_for_player(p)
+                else:
+                    player_div = Team.best_known_division(p.teams, known_teams)
+
+                if player_div is not None and (highest_div is None or player_div < highest_div):
+                    highest_div = player_div
+                    best_player = p
 
-        if highest_div.is_unknown or team.current_div.is_unknown or best_player is None:
+        if best_player is None:
             return ''
-        elif highest_div == team.current_div:
+        elif highest_div >= team.current_div:
             return 'No higher div players.'
         else:
             name: str = best_player.name.value
@@ -0,0 +1,43 @@
+from typing import Union
+from uuid import UUID
+
+from core_classes.bracket import UNKNOWN_BRACKET
+
+
+class TopPlacement:
+    """
+    A player's high finish in a bracket, precomputed into the Players snapshot
+    so that their notable results can be shown without the whole bracket.
+    """
+
+    source: UUID
+    """The id of the Source that the bracket belongs to."""
+
+    bracket_name: str
+    """The name of the bracket."""
+
+    rank: int
+    """The rank achieved, 1 being the winner."""
+
+    def __init__(self,
+                 source: Union[str, UUID],
+                 bracket_name: str = UNKNOWN_BRACKET,
+                 rank: int = 1):
+        self.source = source if isinstance(source, UUID) else UUID(source)
+        self.bracket_name = bracket_name or UNKNOWN_BRACKET
+        self.rank = rank
+
+    def __str__(self):
+        return f'{self.rank} in {self.bracket_name}'
+
+    @staticmethod
+    def from_dict(obj: dict) -> 'TopPlacement':
+        assert isinstance(obj, dict)
+        return TopPlacement(
+            source=obj.get("S"),
+            bracket_name=obj.get("B", UNKNOWN_BRACKET),
+            rank=int(obj.get("R", 1))
+        )
+
+    def to_dict(self) -> dict:
+        return {"S": self.source.__str__(), "B": self.bracket_name, "R": self.rank}
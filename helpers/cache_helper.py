@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import TypeVar, Generic, Optional, Callable, Hashable
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A least-recently-used cache, bounded by its number of entries and optionally by the total size of its values.
+    Safe to use from worker threads.
+    """
+
+    def __init__(self,
+                 max_entries: int,
+                 max_size: Optional[int] = None,
+                 size_of: Optional[Callable[[V], int]] = None):
+        """
+        :param max_entries: The maximum number of entries to keep
+        :param max_size: Optional maximum total size of the values, measured by size_of
+        :param size_of: Callable function that returns the size of a value. Required if max_size is specified.
+        """
+        if max_size is not None and size_of is None:
+            raise ValueError('size_of must be specified with max_size.')
+
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.size_of = size_of
+        self.size = 0
+        """The current total size of the values, if size_of is specified."""
+
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Get the value for the key and mark it as recently used, or return default."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: K, value: V):
+        """Add or replace the value for the key, evicting the least recently used entries to stay within bounds.
+        A value that is bigger than max_size by itself is not cached."""
+        value_size = self.size_of(value) if self.size_of else 0
+        if self.max_size is not None and value_size > self.max_size:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = value
+            self.size += value_size
+
+            while len(self._entries) > self.max_entries \
+                    or (self.max_size is not None and self.size > self.max_size):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: K):
+        value = self._entries.pop(key)
+        if self.size_of:
+            self.size -= self.size_of(value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
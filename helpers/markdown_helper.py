@@ -0,0 +1,54 @@
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+_BATCH_SEPARATOR = '\0'
+"""Joins names for the batch paths. Names containing it fall back to escaping one at a time."""
+
+
+@lru_cache(maxsize=64)
+def _escape_plan(characters: str, escape_character: str) -> Tuple[Tuple[str, str], ...]:
+    """
+    Make the (character, replacement) pairs for escaping the characters.
+    The escape character itself is escaped first so that the escapes we add are not escaped again.
+    """
+    ordered = sorted(set(characters), key=lambda c: c != escape_character)
+    return tuple((char, escape_character + char) for char in ordered)
+
+
+def escape(text: str, characters: str = '\\', escape_character: str = '\\') -> str:
+    """
+    Escape the characters in the text with the escape character.
+    Only characters that are present are replaced, so text with nothing to escape is returned as-is.
+    """
+    for char, replacement in _escape_plan(characters, escape_character):
+        if char in text:
+            text = text.replace(char, replacement)
+    return text
+
+
+def escape_all(texts: Iterable[str], characters: str = '\\', escape_character: str = '\\') -> List[str]:
+    """
+    Escape a batch of texts, e.g. a player's names.
+    The batch is escaped as a single joined string, which is faster than escaping each text in turn.
+    """
+    texts = list(texts)
+    joined = _BATCH_SEPARATOR.join(texts)
+    if _BATCH_SEPARATOR in characters or joined.count(_BATCH_SEPARATOR) != len(texts) - 1:
+        return [escape(text, characters, escape_character) for text in texts]
+
+    for char, replacement in _escape_plan(characters, escape_character):
+        if char in joined:
+            joined = joined.replace(char, replacement)
+    return joined.split(_BATCH_SEPARATOR) if texts else []
+
+
+def code_wrap(name: str) -> str:
+    """
+    Wrap the name in code markdown if it would otherwise be formatted by Discord.
+    Names with backticks are wrapped in a code block, and names with underscores or asterisks in inline code.
+    """
+    if '`' in name:
+        return f"```{name}```"
+    elif '_' in name or '*' in name:
+        return f"`{name}`"
+    return name
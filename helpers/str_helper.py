@@ -60,3 +60,16 @@ def join(separator: str, collection: list) -> str:
     :return: Joined string
     """
     return separator.join(map(str, collection))
+
+
+def ordinal(number: int) -> str:
+    """
+    Get the ordinal representation of a number, e.g. 1st, 2nd, 3rd, 11th, 22nd.
+    :param number: The number
+    :return: The number with its ordinal suffix
+    """
+    if 10 <= number % 100 <= 20:
+        suffix = 'th'
+    else:
+        suffix = {1: 'st', 2: 'nd', 3: 'rd'}.get(number % 10, 'th')
+    return f'{number}{suffix}'
@@ -1,9 +1,10 @@
+import asyncio
 import glob
 import json
 import re
 import sys
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Union, Set, Iterable, Generator, Collection
+from typing import List, Dict, Any, Optional, Union, Set, Iterable, Generator, Collection, Callable, Awaitable
 from uuid import UUID
 
 from dateutil.parser import isoparse
@@ -15,6 +16,7 @@ from core_classes.game import Game
 from core_classes.player import Player
 from core_classes.score import Score
 from core_classes.source import Source
+from core_classes.source_metadata import parse_source_name
 from core_classes.team import Team
 from helpers.dict_helper import add_set_by_key, first_key
 from misc.slapp_files_utils import get_latest_snapshot_sources_file, \
@@ -68,8 +70,12 @@ TOURNAMENT_INFO_MINIMAL_FETCH_ADDRESS_FORMAT: str = CLOUD_BACKEND + '/tournament
 TEAMS_FETCH_ADDRESS_FORMAT: str = CLOUD_BACKEND + '/tournaments/%s/teams'
 
 
-# TODO - implement force download
 def download_from_battlefy(ids: Union[str, List[str]], force: bool = False) -> Generator[List[dict], None, None]:
+    """
+    Get the teams list of each tournament, downloading the files that we don't already have.
+    :param ids: The tourney id(s) to download
+    :param force: Download the teams files again even if we have them, e.g. to get new signups
+    """
     if isinstance(ids, str):
         if ids.startswith('['):
             ids = json.loads(ids)
@@ -78,12 +84,43 @@ def download_from_battlefy(ids: Union[str, List[str]], force: bool = False) -> G
 
     for id_to_fetch in ids:
         if get_or_fetch_tourney_info_file(id_to_fetch):
-            yield get_or_fetch_tourney_teams_file(id_to_fetch)
+            yield get_or_fetch_tourney_teams_file(id_to_fetch, force)
         else:
             print(f'Nothing exists at {id_to_fetch}.')
             continue
 
 
+async def download_from_battlefy_async(ids: Union[str, List[str]],
+                                       force: bool = False,
+                                       progress: Optional[Callable[[str], Awaitable[Any]]] = None) -> List[List[dict]]:
+    """
+    Download the tournaments' teams like download_from_battlefy, but with the requests and file I/O run in the
+    default executor so that the event loop (i.e. the bot) is not blocked.
+    :param ids: The tourney id(s) to download
+    :param force: As download_from_battlefy
+    :param progress: Optional coroutine function that is awaited with a message as each step starts
+    :return: The teams list of each tournament that exists
+    """
+    if isinstance(ids, str):
+        if ids.startswith('['):
+            ids = json.loads(ids)
+        else:
+            ids = [ids]
+
+    loop = asyncio.get_event_loop()
+    result = []
+    for id_to_fetch in ids:
+        if progress:
+            await progress(f'Fetching the tournament info for {id_to_fetch}...')
+        if await loop.run_in_executor(None, get_or_fetch_tourney_info_file, id_to_fetch):
+            if progress:
+                await progress(f'Fetching the teams for {id_to_fetch}...')
+            result.append(await loop.run_in_executor(None, get_or_fetch_tourney_teams_file, id_to_fetch, force))
+        else:
+            print(f'Nothing exists at {id_to_fetch}.')
+    return result
+
+
 def get_or_fetch_tourney_ids() -> Set[str]:
     """Get a set of tourney ids from the Orgs that we watch. This will download the tourney info file."""
 
@@ -197,33 +234,47 @@ def get_or_fetch_standings_file(tourney_id_to_fetch: str, stage_id_to_fetch: str
     return _stage_contents
 
 
-def get_or_fetch_tourney_teams_file(tourney_id_to_fetch: str) -> Optional[List[dict]]:
+def get_or_fetch_tourney_teams_file(tourney_id_to_fetch: str, force: bool = False) -> Optional[List[dict]]:
+    """
+    Get the tourney's teams file, downloading it if we don't have it.
+    :param tourney_id_to_fetch: The tourney id
+    :param force: Download the file again even if we have it. If that fails, the file we have is used.
+    """
     if not exists(TOURNEY_TEAMS_SAVE_DIR):
         makedirs(TOURNEY_TEAMS_SAVE_DIR)
 
     filename: str = f'{tourney_id_to_fetch}.json'
     matched_tourney_files = glob.glob(join(TOURNEY_TEAMS_SAVE_DIR, f'*{filename}'))
     full_path = matched_tourney_files[0] if len(matched_tourney_files) else join(TOURNEY_TEAMS_SAVE_DIR, filename)
-    if not isfile(full_path):
-        teams_contents = fetch_address(TEAMS_FETCH_ADDRESS_FORMAT % tourney_id_to_fetch)
+    have_file = isfile(full_path)
+    if force or not have_file:
+        try:
+            teams_contents = fetch_address(TEAMS_FETCH_ADDRESS_FORMAT % tourney_id_to_fetch)
+        except Exception as e:
+            if not have_file:
+                raise
+            print(f'get_or_fetch_tourney_teams_file: Failed to download {tourney_id_to_fetch=} again, '
+                  f'using the file we have. ({e})')
+            return utils.load_json_from_file(full_path)
 
         if len(teams_contents) == 0:
             print(f'ERROR get_or_fetch_tourney_teams_file: Nothing exists at {tourney_id_to_fetch=}.')
             return None
 
-        # To name this file, we need the tourney file that goes with it.
-        info_contents = get_or_fetch_tourney_info_file(tourney_id_to_fetch)
+        # To name this file, we need the tourney file that goes with it. A forced download keeps the existing name.
+        if not have_file:
+            info_contents = get_or_fetch_tourney_info_file(tourney_id_to_fetch)
 
-        if '_id' in info_contents and 'slug' in info_contents and 'startTime' in info_contents:
-            start_time: datetime = isoparse(info_contents['startTime'])
-            filename = f'{start_time.strftime("%Y-%m-%d")}-{info_contents["slug"]}-' \
-                       f'{tourney_id_to_fetch}.json'
-            full_path = join(TOURNEY_TEAMS_SAVE_DIR, filename)
-        else:
-            print(f"Couldn't name the downloaded tourney teams file as the tourney info is incomplete: "
-                  f"{'_id' in info_contents=} "
-                  f"{'slug' in info_contents=} "
-                  f"{'startTime' in info_contents=}")
+            if '_id' in info_contents and 'slug' in info_contents and 'startTime' in info_contents:
+                start_time: datetime = isoparse(info_contents['startTime'])
+                filename = f'{start_time.strftime("%Y-%m-%d")}-{info_contents["slug"]}-' \
+                           f'{tourney_id_to_fetch}.json'
+                full_path = join(TOURNEY_TEAMS_SAVE_DIR, filename)
+            else:
+                print(f"Couldn't name the downloaded tourney teams file as the tourney info is incomplete: "
+                      f"{'_id' in info_contents=} "
+                      f"{'slug' in info_contents=} "
+                      f"{'startTime' in info_contents=}")
 
         print(f'OK! (Saved read tourney to {full_path})')
 
@@ -311,9 +362,32 @@ def get_source_by_tourney_id(tourney_id: str,
     return None
 
 
+def get_battlefy_ids(sources: Iterable[dict], without_brackets: bool = False) -> Set[str]:
+    """Get the Battlefy tournament ids of the sources, optionally only those that have no brackets yet."""
+    battlefy_ids = set()
+    for source_dict_item in sources:
+        if without_brackets and source_dict_item.get("Brackets", None):
+            continue
+        battlefy_id = parse_source_name(source_dict_item.get("Name", '')).battlefy_id
+        if battlefy_id:
+            battlefy_ids.add(battlefy_id)
+    return battlefy_ids
+
+
+def index_sources_by_battlefy_id(sources: Iterable[dict]) -> Dict[str, dict]:
+    """Index the Battlefy sources by their tournament id, so they don't need to be searched for each tourney."""
+    index = {}
+    for source_dict_item in sources:
+        battlefy_id = parse_source_name(source_dict_item.get("Name", '')).battlefy_id
+        if battlefy_id:
+            index[battlefy_id] = source_dict_item
+    return index
+
+
 def add_tourney_placement_to_source(tourney_id: str,
                                     players: Iterable[Player],
-                                    sources: List[dict]) -> bool:
+                                    sources: List[dict],
+                                    sources_by_tourney_id: Optional[Dict[str, dict]] = None) -> bool:
     stage_ids = set([stage_id for stage_id in get_stage_ids_for_tourney(tourney_id)
                      if is_valid_battlefy_id(stage_id)])
     if len(stage_ids) == 0:
@@ -321,7 +395,10 @@ def add_tourney_placement_to_source(tourney_id: str,
         return False
 
     # Find the suitable source in the latest sources snapshot
-    source_dict = get_source_by_tourney_id(tourney_id, sources)
+    if sources_by_tourney_id is not None:
+        source_dict = sources_by_tourney_id.get(tourney_id)
+    else:
+        source_dict = get_source_by_tourney_id(tourney_id, sources)
     if source_dict:
         source = Source.from_dict(source_dict)
         sources.remove(source_dict)
@@ -475,6 +552,8 @@ def add_tourney_placement_to_source(tourney_id: str,
     dict_to_save = source.to_dict()
     utils.assert_is_dict_recursive(dict_to_save)
     sources.append(dict_to_save)
+    if sources_by_tourney_id is not None:
+        sources_by_tourney_id[tourney_id] = dict_to_save
     return True
 
 
@@ -494,12 +573,7 @@ def update_sources_with_placements(tourney_ids: Optional[Collection[str]] = None
         assert players, "No Players found in the Players snapshot file."
 
     if not tourney_ids:
-        # rpartition finds the last '-', we want the substring past that to the end which is [2].
-        tourney_ids = set([source["Name"].rpartition('-')[2] for source in sources
-                           if not source.get("Brackets", None)
-                           and '-stat.ink-' not in source.get("Name", None)
-                           and '-LUTI-' not in source.get("Name", None)
-                           and 'Twitter-' not in source.get("Name", None)])
+        tourney_ids = get_battlefy_ids(sources, without_brackets=True)
 
     if not destination_sources_path:
         destination_sources_path = \
@@ -513,9 +587,10 @@ def update_sources_with_placements(tourney_ids: Optional[Collection[str]] = None
     if original_count != actual_count:
         print(f'Some ids were filtered as they were invalid ({original_count} -> {len(tourney_ids)})')
 
+    sources_by_tourney_id = index_sources_by_battlefy_id(sources)
     for i, tourney_id in enumerate(tourney_ids):
         print(f'[{i+1}/{actual_count}] Working on {tourney_id=}')
-        has_changes = add_tourney_placement_to_source(tourney_id, players, sources)
+        has_changes = add_tourney_placement_to_source(tourney_id, players, sources, sources_by_tourney_id)
         if has_changes:
             print(f"Finished {tourney_id=}, changes made.")
         else:
@@ -545,19 +620,10 @@ if __name__ == '__main__':
     global_sources: List[dict] = utils.load_json_from_file(global_snapshot_sources_path)
 
     if global_ids[0] == '*':
-        # rpartition finds the last '-', we want the substring past that to the end which is [2].
-        global_ids = set([source["Name"].rpartition('-')[2] for source in global_sources
-                          if not source.get("Brackets", None)
-                          and '-stat.ink-' not in source.get("Name", None)
-                          and '-LUTI-' not in source.get("Name", None)
-                          and 'Twitter-' not in source.get("Name", None)])
+        global_ids = get_battlefy_ids(global_sources, without_brackets=True)
 
     elif global_ids[0] == 'DISCARD':
-        # rpartition finds the last '-', we want the substring past that to the end which is [2].
-        global_ids = set([source["Name"].rpartition('-')[2] for source in global_sources
-                          if '-stat.ink-' not in source.get("Name", None)
-                          and '-LUTI-' not in source.get("Name", None)
-                          and 'Twitter-' not in source.get("Name", None)])
+        global_ids = get_battlefy_ids(global_sources)
 
     update_sources_with_placements(tourney_ids=global_ids,
                                    destination_sources_path=global_snapshot_sources_path + ".edited.json",
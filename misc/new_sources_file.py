@@ -2,13 +2,15 @@ import asyncio
 import glob
 import json
 import sys
-from os.path import join, relpath
+from os.path import join, relpath, basename, splitext
 from typing import Set
 
+from core_classes.source_metadata import parse_source_name
 from helpers.str_helper import equals_ignore_case
 from misc import utils
 from misc.download_from_battlefy_result import get_or_fetch_tourney_ids, get_or_fetch_tourney_teams_file, \
     update_sources_with_placements
+from misc.placements_to_players import update_players_with_top_placements
 from misc.slapp_files_utils import TOURNEY_TEAMS_SAVE_DIR
 from misc.sources_to_skills import update_sources_with_skills
 from misc.utils import save_text_to_file
@@ -62,6 +64,7 @@ def full_rebuild(skip_pauses: bool = False):
     # 3. Rebuild the database  -- we could implement a partial update using what we have already
     # 4. Add in placements     -- again, if we kep what's already there, we'd only be adding to new tourneys
     # 5. Calculate ELO         -- again, calculating only the new bits
+    # 6. Store the players' top placements in the players snapshot
 
     # 1. Tourney ids
     do_fetch_tourney_ids = ask("Fetch new tourney ids? [Y/N]")
@@ -76,13 +79,15 @@ def full_rebuild(skip_pauses: bool = False):
     with open(join(SLAPP_APP_DATA, 'sources.yaml'), 'r', encoding='utf-8') as infile:
         sources_contents = infile.read().split('\n')
 
+    # The tourney ids already in the sources yaml, from the file names which end in the id
+    known_tourney_ids = {parse_source_name(splitext(basename(line))[0]).battlefy_id for line in sources_contents}
+
     # Sources now that we've pulled in the tourney files:
     updated_tourney_ids = set()
     updated_tourney_paths = set()
     for tourney_id in full_tourney_ids:
-        # Search the sources yaml
         filename = tourney_id + ".json"
-        if any([line.endswith(filename) for line in sources_contents]):
+        if tourney_id in known_tourney_ids:
             # Not new
             pass
         else:
@@ -186,7 +191,13 @@ def full_rebuild(skip_pauses: bool = False):
         pause(True)
     update_sources_with_skills(clear_current_skills=True)
 
-    print("Phase 5 done, complete!")
+    print("Phase 5 done.")
+    # 6. Top placements
+    if not skip_pauses:
+        pause(True)
+    update_players_with_top_placements()
+
+    print("Phase 6 done, complete!")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,71 @@
+from datetime import datetime
+from os.path import join
+from typing import List, Dict, Optional
+
+from core_classes.bracket import UNKNOWN_BRACKET
+from core_classes.player import Player
+from core_classes.top_placement import TopPlacement
+from helpers.dict_helper import to_list
+from misc import utils
+from misc.slapp_files_utils import load_latest_snapshot_players_file, load_latest_snapshot_sources_file
+from tokens import SLAPP_APP_DATA
+
+TOP_PLACEMENTS_MAX_RANK = 8
+"""The lowest rank that is stored as a top placement, e.g. 8 for top 8 finishes."""
+
+
+def update_players_with_top_placements(
+        max_rank: int = TOP_PLACEMENTS_MAX_RANK,
+        destination_players_path: Optional[str] = None,
+        sources: Optional[List[dict]] = None,
+        players: Optional[List[Player]] = None):
+    """
+    Store each player's finishes at max_rank or better in the Players snapshot, so that their notable results
+    can be shown without the brackets. Run after update_sources_with_placements has added the brackets.
+    """
+
+    if not sources:
+        print('Loading sources...')
+        sources = load_latest_snapshot_sources_file()
+        assert sources, "No Sources found in the Sources snapshot file."
+
+    if not players:
+        print('Loading players...')
+        players = load_latest_snapshot_players_file()
+        assert players, "No Players found in the Players snapshot file."
+
+    if not destination_players_path:
+        destination_players_path = \
+            join(SLAPP_APP_DATA, f"Snapshot-Players-{datetime.strftime(datetime.now(), '%Y-%m-%d-%H-%M-%S')}.json")
+
+    # The placements are read straight from the dictionaries, as only the ids by rank are needed from the brackets.
+    players_dict: Dict[str, Player] = {p.guid.__str__(): p for p in players}
+    for player in players:
+        player.top_placements = []
+
+    placements_count = 0
+    for source in sources:
+        source_id = source.get("Id")
+        for bracket_dict in source.get("Brackets", []):
+            bracket_name = bracket_dict.get("Name", UNKNOWN_BRACKET)
+            players_by_placement: Dict[str, List[str]] = \
+                bracket_dict.get("Placements", {}).get("PlayersByPlacement", {})
+            for rank_str, player_ids in players_by_placement.items():
+                rank = int(rank_str)
+                if rank > max_rank:
+                    continue
+
+                for player_id in player_ids:
+                    player = players_dict.get(player_id)
+                    if player:
+                        player.top_placements.append(TopPlacement(source_id, bracket_name, rank))
+                        placements_count += 1
+                    else:
+                        print(f"Player in placements was not found in the Players snapshot: {player_id}")
+
+    print(f"All done, {placements_count} top placements. Saving the Players snapshot to: " + destination_players_path)
+    utils.save_as_json_to_file(destination_players_path, to_list(lambda x: Player.to_dict(x), players))
+
+
+if __name__ == '__main__':
+    update_players_with_top_placements()
@@ -9,6 +9,7 @@ from tokens import SLAPP_APP_DATA
 TOURNEY_INFO_SAVE_DIR = SLAPP_APP_DATA + "\\tourney_info"
 TOURNEY_TEAMS_SAVE_DIR = SLAPP_APP_DATA + "\\tourney_teams"
 STAGES_SAVE_DIR = TOURNEY_INFO_SAVE_DIR + "\\stages"
+AUTOSEED_SAVE_DIR = SLAPP_APP_DATA + "\\autoseed"
 
 
 def get_all_snapshot_players_files() -> List[str]:
@@ -0,0 +1,84 @@
+from collections import namedtuple
+from typing import List, Dict, Tuple, Optional
+
+from core_classes.player import Player
+from core_classes.skill import Skill
+from helpers.str_helper import truncate
+from misc import utils
+from misc.download_from_battlefy_result import download_from_battlefy
+from misc.slapp_files_utils import load_latest_snapshot_players_file
+
+WORST_PAIRINGS_COUNT = 10
+"""The number of the most lopsided pairings to highlight."""
+
+Pairing = namedtuple('Pairing', ('team_1', 'team_2', 'favouring_team_1', 'favouring_team_2'))
+"""A pairing of two teams by name, and the quality of their game favouring each team as a percentage."""
+
+
+def fairest_chance(pairing: Pairing) -> int:
+    """The pairing's chance of a fair game if the rosters are as close as they can be."""
+    return max(pairing.favouring_team_1, pairing.favouring_team_2)
+
+
+def quality_matrix_pairings(team_names: List[str], team_skills: List[List[Skill]]) -> List[Pairing]:
+    """
+    Calculate the quality of the game for every pairing of the teams, as a batch.
+    Teams without any skills are left out.
+    """
+    teams = [(name, skills) for name, skills in zip(team_names, team_skills) if skills]
+    matrix = Skill.quality_matrix([skills for _, skills in teams])
+    return [Pairing(teams[i][0], teams[j][0], *matrix[i][j])
+            for i in range(len(teams)) for j in range(i + 1, len(teams))]
+
+
+def worst_pairings(pairings: List[Pairing], count: int = WORST_PAIRINGS_COUNT) -> List[Pairing]:
+    """Get the count most lopsided pairings, i.e. those with the lowest fairest chance, worst first."""
+    return sorted(pairings, key=fairest_chance)[:count]
+
+
+def format_pairing(pairing: Pairing) -> str:
+    return f"{truncate(pairing.team_1, 30, '…')} vs {truncate(pairing.team_2, 30, '…')}: " \
+           f"at best {fairest_chance(pairing)}% chance of fair game " \
+           f"({pairing.favouring_team_1}%/{pairing.favouring_team_2}%)"
+
+
+def team_skills_from_players(tournament: List[dict], players: List[Player]) -> Tuple[List[str], List[List[Skill]]]:
+    """
+    Get the names of the tournament's teams and their players' skills, matching the Battlefy players to the
+    Players by persistent id. Players who can't be matched have a default Skill.
+    """
+    players_by_persistent_id: Dict[str, Player] = {persistent_id: player for player in players
+                                                   for persistent_id in player.battlefy.battlefy_persistent_id_strings}
+    team_names = []
+    team_skills = []
+    for team in tournament:
+        battlefy_players = [player for player in team.get('players') or [] if player.get('persistentPlayerID')]
+        team_names.append(team.get('name') or '(unnamed team)')
+        team_skills.append([players_by_persistent_id[player['persistentPlayerID']].skill
+                            if player['persistentPlayerID'] in players_by_persistent_id else Skill()
+                            for player in battlefy_players])
+    return team_names, team_skills
+
+
+def main(tourney_id: str, matrix_path: Optional[str] = None, players: Optional[List[Player]] = None):
+    """Print the tournament's most lopsided pairings, and optionally save every pairing to matrix_path."""
+    if not players:
+        print('Loading players...')
+        players = load_latest_snapshot_players_file()
+        assert players, "No Players found in the Players snapshot file."
+
+    for tournament in download_from_battlefy(tourney_id, force=True):
+        team_names, team_skills = team_skills_from_players(tournament or [], players)
+        pairings = quality_matrix_pairings(team_names, team_skills)
+        print(f'Calculated {len(pairings)} pairings between {len(team_names)} teams. The most lopsided are:')
+        for pairing in worst_pairings(pairings):
+            print(format_pairing(pairing))
+
+        if matrix_path:
+            utils.save_as_json_to_file(matrix_path, [pairing._asdict() for pairing in pairings])
+            print(f'Saved every pairing to {matrix_path}')
+
+
+if __name__ == '__main__':
+    main(tourney_id=input('Tournament id?'),
+         matrix_path=input('Save every pairing to? (Enter to skip)').replace('"', '') or None)
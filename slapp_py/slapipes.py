@@ -10,8 +10,9 @@ import os
 import re
 import traceback
 from asyncio import Queue
+from concurrent.futures import ProcessPoolExecutor
 from operator import itemgetter
-from typing import List, Dict, Callable, Any, Awaitable, Set
+from typing import List, Dict, Callable, Any, Awaitable, Set, Tuple, Optional, TypeVar
 from uuid import UUID
 
 from discord import Color, Embed
@@ -23,14 +24,54 @@ from core_classes.bracket import Bracket
 from core_classes.player import Player
 from core_classes.skill import Skill
 from core_classes.team import Team
+from helpers.cache_helper import LRUCache
+from helpers.markdown_helper import escape, escape_all, code_wrap
 from helpers.str_helper import join, truncate
 from slapp_py.footer_phrases import get_random_footer_phrase
 from slapp_py.slapp_response_object import SlappResponseObject
-from slapp_py.strings import escape_characters, attempt_link_source
+from slapp_py.strings import attempt_link_source
 
 MAX_RESULTS = 20
-slapp_write_queue: Queue[str] = Queue()
+RENDER_CACHE_MAX_ENTRIES = 2000
+DESCRIBE_CACHE_MAX_ENTRIES = 256
+LAYOUT_SINGLE = 'single'
+"""Render layout for a lone result, where its details are spread over several fields."""
+LAYOUT_LIST = 'list'
+"""Render layout for one of several results, where its details are condensed into one field."""
+LAYOUT_COMPACT = 'compact'
+"""Render layout for broad searches, where each result is a single line of a table."""
+COMPACT_MIN_RESULTS = 30
+"""Responses with more matched players or teams than this are rendered in the compact layout."""
+COMPACT_MAX_RESULTS = 60
+"""The maximum number of players and of teams shown in the compact layout."""
+
+RENDER_IN_THREAD = 'thread'
+"""Off-loop render mode that uses the event loop's default thread pool. Keeps the render cache warm."""
+RENDER_IN_PROCESS = 'process'
+"""Off-loop render mode that uses a worker process, so the render does not hold the bot's GIL."""
+OFF_LOOP_MIN_ENTITIES = 40
+"""Responses with fewer players and teams than this are rendered inline as handing them off costs more."""
+
+RenderedField = Tuple[str, str, bool]
+"""A rendered embed field: its name, value, and inline flag."""
+
+T = TypeVar('T')
+
+slapp_write_queue: Queue[Optional[str]] = Queue()
+"""Queries to write to Slapp. None is put when Slapp exits, to stop the writer."""
 slapp_loop = True
+slapp_snapshot_version: int = 0
+"""Incremented each time Slapp is started, as Slapp (re)loads the snapshot when it starts."""
+slapp_snapshot_file: Optional[str] = None
+"""The Players snapshot file that Slapp loaded when it was last started, or None if Slapp hasn't been started."""
+
+render_cache: LRUCache = LRUCache(max_entries=RENDER_CACHE_MAX_ENTRIES)
+"""Rendered embed fields keyed by (entity guid, snapshot version, layout)."""
+
+describe_cache: LRUCache = LRUCache(max_entries=DESCRIBE_CACHE_MAX_ENTRIES)
+"""Successful describe responses keyed by (slapp id, snapshot version)."""
+
+_render_process_pool: Optional[ProcessPoolExecutor] = None
 
 
 async def _default_response_handler(success_message: str, response: dict) -> None:
@@ -51,7 +92,7 @@ async def _read_stdout(stdout):
             if not response:
                 print('stdout: (none response)')
                 await asyncio.sleep(1)
-            elif response.startswith(b"eyJNZXNzYWdlIjoiT"):  # This is the b64 start of a Slapp message.
+            elif response.startswith(b"eyJNZXNzYWdlIjoi"):  # This is the b64 start of a Slapp message, {"Message":"
                 decoded_bytes = base64.b64decode(response)
                 response = json.loads(str(decoded_bytes, "utf-8"))
                 await response_function(response.get("Message", "Response does not contain Message."), response)
@@ -72,6 +113,7 @@ async def _read_stderr(stderr):
                 print('stderr: none response, this indicates Slapp has exited.')
                 print('stderr: Terminating slapp_loop.')
                 slapp_loop = False
+                slapp_write_queue.put_nowait(None)
                 break
             else:
                 print('stderr: ' + response)
@@ -85,20 +127,26 @@ async def _write_stdin(stdin):
     print('_write_stdin')
     while slapp_loop:
         try:
-            while not slapp_write_queue.empty():
-                query = await slapp_write_queue.get()
-                print(f'_write_stdin: writing {query}')
-                stdin.write(f'{query}\n'.encode('utf-8'))
-                await stdin.drain()
-                await asyncio.sleep(0.1)
-            await asyncio.sleep(1)
+            # Wait for the next query rather than polling, so that queries that are queued together are written
+            # straight away and Slapp can work through them back-to-back. drain() applies the pipe's back-pressure.
+            query = await slapp_write_queue.get()
+            if query is None:  # Slapp has exited
+                break
+            print(f'_write_stdin: writing {query}')
+            stdin.write(f'{query}\n'.encode('utf-8'))
+            await stdin.drain()
         except Exception as e:
             print(f'_write_stdin EXCEPTION: {e}\n{traceback.format_exc()}')
 
 
 async def _run_slapp(slapp_path: str, mode: str):
+    from misc.slapp_files_utils import get_latest_snapshot_players_file
     global slapp_loop
+    global slapp_snapshot_version
+    global slapp_snapshot_file
 
+    # Slapp loads the latest snapshot as it starts, and a snapshot written while it runs isn't loaded until it restarts.
+    slapp_snapshot_file = await asyncio.get_event_loop().run_in_executor(None, get_latest_snapshot_players_file)
     proc = await asyncio.create_subprocess_shell(
         f'dotnet \"{slapp_path}\" \"%#%@%#%\" {mode}',
         stdin=asyncio.subprocess.PIPE,
@@ -111,6 +159,7 @@ async def _run_slapp(slapp_path: str, mode: str):
     )
 
     slapp_loop = True
+    slapp_snapshot_version += 1
     await asyncio.gather(
         _read_stderr(proc.stderr),
         _read_stdout(proc.stdout),
@@ -139,6 +188,14 @@ async def initialise_slapp(new_response_function: Callable[[str, dict], Any], mo
 
 async def query_slapp(query: str):
     """Query Slapp. The response comes back through the callback function that was passed in initialise_slapp."""
+    query_slapp_nowait(query)
+
+
+def query_slapp_nowait(query: str):
+    """
+    Query Slapp without yielding to the event loop, so that the caller can pair the query with its response
+    routing atomically. The response comes back through the callback function that was passed in initialise_slapp.
+    """
     options: Set[str] = set()
 
     # Handle options
@@ -167,26 +224,44 @@ async def query_slapp(query: str):
         options.add("--queryIsRegex")
 
     print(f"Posting {query=} to existing Slapp process with options {' '.join(options)} ...")
-    await slapp_write_queue.put('--b64 ' + str(base64.b64encode(query.encode("utf-8")), "utf-8") + ' ' +
-                                ' '.join(options))
+    slapp_write_queue.put_nowait('--b64 ' + str(base64.b64encode(query.encode("utf-8")), "utf-8") + ' ' +
+                                 ' '.join(options))
 
 
 async def slapp_describe(slapp_id: str):
-    await slapp_write_queue.put(f'--slappId {slapp_id}')
+    slapp_describe_nowait(slapp_id)
 
 
-def process_slapp(response: dict) -> (Embed, Color):
-    r: SlappResponseObject = SlappResponseObject(response)
+def slapp_describe_nowait(slapp_id: str):
+    """Describe the slapp id without yielding to the event loop, as query_slapp_nowait."""
+    slapp_write_queue.put_nowait(f'--slappId {slapp_id}')
 
-    if r.has_matched_players and r.has_matched_teams:
-        title = f"Found {r.matched_players_len} player{('' if (r.matched_players_len == 1) else 's')} " \
-                f"and {r.matched_teams_len} team{('' if (r.matched_teams_len == 1) else 's')}!"
+
+def get_cached_describe(slapp_id: str) -> Optional[dict]:
+    """Get the describe response for the slapp id if it was cached for the loaded snapshot."""
+    return describe_cache.get((slapp_id, slapp_snapshot_version))
+
+
+def cache_describe(slapp_id: str, response: dict):
+    """Cache the describe response for the slapp id against the loaded snapshot."""
+    describe_cache.put((slapp_id, slapp_snapshot_version), response)
+
+
+def process_slapp(response: dict) -> (Embed, Color):
+    player_dicts: List[dict] = response.get("Players") or []
+    team_dicts: List[dict] = response.get("Teams") or []
+    matched_players_len = len(player_dicts)
+    matched_teams_len = len(team_dicts)
+
+    if matched_players_len and matched_teams_len:
+        title = f"Found {matched_players_len} player{('' if (matched_players_len == 1) else 's')} " \
+                f"and {matched_teams_len} team{('' if (matched_teams_len == 1) else 's')}!"
         colour = Color.green()
-    elif r.has_matched_players and not r.has_matched_teams:
-        title = f"Found {r.matched_players_len} player{('' if (r.matched_players_len == 1) else 's')}!"
+    elif matched_players_len and not matched_teams_len:
+        title = f"Found {matched_players_len} player{('' if (matched_players_len == 1) else 's')}!"
         colour = Color.blue()
-    elif not r.has_matched_players and r.has_matched_teams:
-        title = f"Found {r.matched_teams_len} team{('' if (r.matched_teams_len == 1) else 's')}!"
+    elif not matched_players_len and matched_teams_len:
+        title = f"Found {matched_teams_len} team{('' if (matched_teams_len == 1) else 's')}!"
         colour = Color.gold()
     else:
         title = f"Didn't find anything 😔"
@@ -195,267 +270,384 @@ def process_slapp(response: dict) -> (Embed, Color):
     builder = to_embed('', colour=colour, title=title)
     embed_colour = colour
 
-    if r.has_matched_players:
-        for i in range(0, MAX_RESULTS):
-            if i >= r.matched_players_len:
-                break
+    # The response is only parsed if there's something to render that isn't in the render cache.
+    r: Optional[SlappResponseObject] = None
 
-            p = r.matched_players[i]
-
-            # Transform names by adding a backslash to any backslashes.
-            names = list(set([escape_characters(name.value) for name in p.names if name and name.value]))
-            current_name = f"{names[0]}" if len(names) else "(Unnamed Player)"
-
-            team_ids: List[UUID] = p.teams
-            resolved_teams: List[Team] = []
-            for team_id in team_ids:
-                from core_classes.builtins import NoTeam
-                if team_id == NoTeam.guid:
-                    resolved_teams.append(NoTeam)
-                else:
-                    team = r.known_teams.get(team_id.__str__(), None)
-                    if not team:
-                        print(f"Team id was not specified in JSON: {team_id}")
-                    else:
-                        resolved_teams.append(team)
-
-            current_team = f'Plays for: ```{resolved_teams[0]}```\n' if resolved_teams else ''
-
-            if len(resolved_teams) > 1:
-                old_teams = truncate('Old teams: \n```' + join("\n", resolved_teams[1:]) + '```\n', 1000, "…\n```\n")
-            else:
-                old_teams = ''
+    def response_object() -> SlappResponseObject:
+        nonlocal r
+        if r is None:
+            r = SlappResponseObject(response)
+        return r
 
-            if len(names) > 1:
-                other_names = truncate("_ᴬᴷᴬ_ ```" + '\n'.join(names[1:]) + "```\n", 1000, "…\n```\n")
-            else:
-                other_names = ''
-
-            battlefy = ''
-            for battlefy_profile in p.battlefy.slugs:
-                battlefy += f'{emojis.BATTLEFY} [{escape_characters(battlefy_profile.value)}]' \
-                            f'({battlefy_profile.uri})\n'
-
-            discord = ''
-            for discord_profile in p.discord.ids:
-                did = escape_characters(discord_profile.value)
-                discord += f'{emojis.DISCORD} [{did}]' \
-                           f'(https://discord.id/?prefill={did}) \n🦑 [Sendou](https://sendou.ink/u/{did})\n'
-
-            twitch = ''
-            for twitch_profile in p.twitch_profiles:
-                twitch += f'{emojis.TWITCH} [{escape_characters(twitch_profile.value)}]' \
-                            f'({twitch_profile.uri})\n'
-
-            twitter = ''
-            for twitter_profile in p.twitter_profiles:
-                twitter += f'{emojis.TWITTER} [{escape_characters(twitter_profile.value)}]' \
-                            f'({twitter_profile.uri})\n'
-
-            player_sources: List[UUID] = p.sources
-            player_sources.reverse()  # Reverse so last added source is first ...
-            player_source_names: List[str] = []
-            for source in player_sources:
-                from core_classes.builtins import BuiltinSource
-                if source == BuiltinSource.guid:
-                    player_source_names.append("(builtin)")
-                else:
-                    name = r.sources.get(source.__str__(), None)
-                    if not name:
-                        print(f"Source was not specified in JSON: {source}")
-                    else:
-                        player_source_names.append(name)
-            player_sources: List[str] = list(map(lambda s: attempt_link_source(s), player_source_names))
-            top500 = (CROWN + " ") if p.top500 else ''
-            country_flag = p.country_flag + ' ' if p.country_flag else ''
-            notable_results = r.get_first_placements(p)
-
-            if '`' in current_name:
-                current_name = f"```{current_name}```"
-            elif '_' in current_name or '*' in current_name:
-                current_name = f"`{current_name}`"
-            field_head = truncate(country_flag + top500 + current_name, 256) or ' '
-
-            # If there's just the one matched player, move the extras to another field.
-            if r.matched_players_len == 1 and r.matched_teams_len < 14:
-                field_body = f'{other_names}'
-                builder.add_field(name=field_head,
-                                  value=truncate(field_body, 1023, "…") or "(Nothing else to say)",
-                                  inline=False)
-
-                if current_team or old_teams:
-                    field_body = f'{current_team}{old_teams}'
-                    builder.add_field(name='    Teams:',
-                                      value=truncate(field_body, 1023, "…") or "(Nothing else to say)",
-                                      inline=False)
-
-                if twitch or twitter or battlefy or discord:
-                    field_body = f'{twitch}{twitter}{battlefy}{discord}'
-                    builder.add_field(name='    Socials:',
-                                      value=truncate(field_body, 1023, "…") or "(Nothing else to say)",
-                                      inline=False)
-
-                if len(notable_results):
-                    notable_results_str = ''
-                    for win in notable_results:
-                        notable_results_str += TROPHY + ' Won ' + win + '\n'
-
-                    builder.add_field(name='    Notable Wins:',
-                                      value=truncate(notable_results_str, 1023, "…"),
-                                      inline=False)
-
-                if len(p.weapons):
-                    builder.add_field(name='    Weapons:',
-                                      value=truncate(', '.join(p.weapons), 1023, "…"),
-                                      inline=False)
-
-                clout_message = p.skill.message
-                if p.skill.is_default:
-                    clout_message += " (this is default.)"
-                builder.add_field(name='    Clout:',
-                                  value=clout_message,
-                                  inline=False)
-
-                if len(player_sources):
-                    for source_batch in range(0, 15):
-                        sources_count = len(player_sources)
-                        value = ''
-                        for j in range(0, min(sources_count, 6)):
-                            value += player_sources[j].__str__() + '\n'
-
-                        builder.add_field(name='    ' + f'Sources ({(source_batch + 1)}):',
-                                          value=truncate(value, 1023, "…"),
-                                          inline=False)
-
-                        player_sources = player_sources[min(sources_count, 7):]
-                        if len(player_sources) <= 0:
-                            break
+    if matched_players_len > COMPACT_MIN_RESULTS or matched_teams_len > COMPACT_MIN_RESULTS:
+        _add_compact_fields(builder, response, player_dicts, team_dicts)
+        max_results = COMPACT_MAX_RESULTS
+        show_limited = matched_players_len > COMPACT_MAX_RESULTS or matched_teams_len > COMPACT_MAX_RESULTS
+    else:
+        # If there's just the one matched player, move the extras to another field.
+        layout = LAYOUT_SINGLE if matched_players_len == 1 and matched_teams_len < 14 else LAYOUT_LIST
+        for i, player_dict in enumerate(player_dicts[0:MAX_RESULTS]):
+            fields = _cached_render(UUID(player_dict["Id"]), layout,
+                                    lambda: _render_player(response_object(), response_object().matched_players[i],
+                                                           layout))
+            for name, value, inline in fields:
+                builder.add_field(name=name, value=value, inline=inline)
+
+        # If there's just the one matched team, move the sources to the next field.
+        layout = LAYOUT_SINGLE if matched_teams_len == 1 else LAYOUT_LIST
+        for i, team_dict in enumerate(team_dicts[0:MAX_RESULTS]):
+            fields = _cached_render(UUID(team_dict["Id"]), layout,
+                                    lambda: _render_team(response_object(), response_object().matched_teams[i], layout))
+            for name, value, inline in fields:
+                builder.add_field(name=name, value=value, inline=inline)
+
+        max_results = MAX_RESULTS
+        show_limited = matched_players_len > 9 or matched_teams_len > 9
+
+    builder.set_footer(
+        text=get_random_footer_phrase() + (
+            f'Only the first {max_results} results are shown for players and teams.' if show_limited else ''
+        ),
+        icon_url="https://media.discordapp.net/attachments/471361750986522647/758104388824072253/icon.png")
+    return builder, embed_colour
 
+
+def render_slapp(response: dict, snapshot_version: Optional[int] = None) -> Tuple[dict, int]:
+    """
+    Render the Slapp response into a serialisable embed dictionary and colour value.
+    This runs in the off-loop workers; a worker process passes the bot's snapshot version for its render cache.
+    """
+    global slapp_snapshot_version
+    if snapshot_version is not None:
+        slapp_snapshot_version = snapshot_version
+
+    builder, colour = process_slapp(response)
+    return builder.to_dict(), colour.value
+
+
+def _response_entities(response: dict) -> int:
+    return len(response.get("Players") or []) \
+        + len(response.get("Teams") or []) \
+        + sum(len(players) for players in (response.get("PlayersForTeams") or {}).values())
+
+
+async def process_slapp_off_loop(response: dict, mode: str = RENDER_IN_THREAD) -> (Embed, Color):
+    """
+    Render the Slapp response like process_slapp, but away from the event loop if it's large,
+    so that other commands are not held up while it renders.
+    :param response: The raw Slapp response dictionary
+    :param mode: RENDER_IN_THREAD or RENDER_IN_PROCESS
+    """
+    global _render_process_pool
+
+    if _response_entities(response) < OFF_LOOP_MIN_ENTITIES:
+        return process_slapp(response)
+
+    loop = asyncio.get_event_loop()
+    if mode == RENDER_IN_PROCESS:
+        if _render_process_pool is None:
+            _render_process_pool = ProcessPoolExecutor(max_workers=1)
+        embed_dict, colour_value = \
+            await loop.run_in_executor(_render_process_pool, render_slapp, response, slapp_snapshot_version)
+    elif mode == RENDER_IN_THREAD:
+        embed_dict, colour_value = await loop.run_in_executor(None, render_slapp, response)
+    else:
+        raise ValueError(f'Unknown render mode: {mode}')
+    return Embed.from_dict(embed_dict), Color(colour_value)
+
+
+def _cached_render(guid: UUID, layout: str, render: Callable[[], T]) -> T:
+    """Get the rendered fields (or compact line) of an entity from the render cache, or render and cache them."""
+    key = (guid, slapp_snapshot_version, layout)
+    fields = render_cache.get(key)
+    if fields is None:
+        fields = render()
+        render_cache.put(key, fields)
+    return fields
+
+
+def _resolve_source_names(r: SlappResponseObject, sources: List[UUID]) -> List[str]:
+    """Get the source names, last added source first."""
+    from core_classes.builtins import BuiltinSource
+    source_names: List[str] = []
+    for source in reversed(sources):
+        if source == BuiltinSource.guid:
+            source_names.append("(builtin)")
+        else:
+            name = r.sources.get(source, None)
+            if not name:
+                print(f"Source was not specified in JSON: {source}")
             else:
-                if len(notable_results):
-                    notable_results_str = ''
-                    for win in notable_results:
-                        notable_results_str += TROPHY + ' Won ' + win + '\n'
-                else:
-                    notable_results_str = ''
-
-                additional_info = "\n `~full " + p.guid.__str__() + "`\n"
-
-                player_sources: str = "Sources:\n" + "\n".join(player_sources)
-                field_body = (f'{other_names}{current_team}{old_teams}'
-                              f'{twitch}{twitter}{battlefy}{discord}'
-                              f'{notable_results_str}{player_sources}') or "(Nothing else to say)"
-                if len(field_body) + len(additional_info) < 1024:
-                    field_body += additional_info
-                else:
-                    field_body = truncate(field_body, 1020 - len(additional_info), indicator="…")
-                    if (field_body.count('```') % 2) == 1:  # If we have an unclosed ```
-                        field_body += '```'
-                    field_body += additional_info
-
-                builder.add_field(name=field_head, value=field_body, inline=False)
-
-    if r.has_matched_teams:
-        separator = ',\n' if r.matched_teams_len == 1 else ', '
-
-        for i in range(0, MAX_RESULTS):
-            if i >= r.matched_teams_len:
-                break
+                source_names.append(name)
+    return source_names
+
+
+def _render_player(r: SlappResponseObject, p: Player, layout: str) -> List[RenderedField]:
+    """Render a matched player as embed fields."""
+    fields: List[RenderedField] = []
+
+    # Transform names by adding a backslash to any backslashes.
+    names = list(dict.fromkeys(escape_all(name.value for name in p.names if name and name.value)))
+    current_name = f"{names[0]}" if len(names) else "(Unnamed Player)"
+
+    team_ids: List[UUID] = p.teams
+    resolved_teams: List[Team] = []
+    for team_id in team_ids:
+        from core_classes.builtins import NoTeam
+        if team_id == NoTeam.guid:
+            resolved_teams.append(NoTeam)
+        else:
+            team = r.known_teams.get(team_id, None)
+            if not team:
+                print(f"Team id was not specified in JSON: {team_id}")
+            else:
+                resolved_teams.append(team)
+
+    current_team = f'Plays for: ```{resolved_teams[0]}```\n' if resolved_teams else ''
 
-            t = r.matched_teams[i]
-            players = r.matched_players_for_teams[t.guid.__str__()]
-            players_in_team: List[Player] = []
-            player_strings = ''
-            for player_tuple in players:
-                if player_tuple:
-                    p = player_tuple["Item1"]
-                    in_team = player_tuple["Item2"]
-                    name = p.name.value
-                    if '`' in name:
-                        name = f"```{name}```"
-                    elif '_' in name or '*' in name:
-                        name = f"`{name}`"
-
-                    player_strings += \
-                        f'{name} {("(Most recent)" if in_team else "(Ex)" if in_team is False else "")}'
-                    player_strings += separator
-                    if in_team:
-                        players_in_team.append(p)
-
-            player_strings = player_strings[0:-len(separator)]
-            div_phrase = Team.best_team_player_div_string(t, players, r.known_teams)
-            if div_phrase:
-                div_phrase += '\n'
-            team_sources: List[UUID] = t.sources
-            team_sources.reverse()  # Reverse so last added source is first ...
-            team_source_names: List[str] = []
-            for source in team_sources:
-                from core_classes.builtins import BuiltinSource
-                if source == BuiltinSource.guid:
-                    team_source_names.append("(builtin)")
-                else:
-                    name = r.sources.get(source.__str__(), None)
-                    if not name:
-                        print(f"Source was not specified in JSON: {source}")
-                    else:
-                        team_source_names.append(name)
-            team_sources: str = "\n ".join([attempt_link_source(s) for s in team_source_names])
-
-            # If there's just the one matched team, move the sources to the next field.
-            if r.matched_teams_len == 1:
-                info = f'{div_phrase}Players: {player_strings}'
-                builder.add_field(name=truncate(t.__str__(), 256, "") or "Unnamed Team",
-                                  value=truncate(info, 1023, "…_"),
-                                  inline=False)
-
-                player_skills = [player.skill for player in players_in_team]
-                (min_clout, min_conf), (max_clout, max_conf) = Skill.team_clout(player_skills)
-
-                if min_conf > 1:  # 1%
-                    if min_clout == max_clout:
-                        clout_message = f"I rate the current team's clout at {min_clout} ({min_conf}% sure)"
-                    else:
-                        clout_message = f"I rate the current team's clout between {min_clout} ({min_conf}% sure) " \
-                                        f"and {max_clout} ({max_conf}% sure)"
-
-                    builder.add_field(name='    Clout:',
-                                      value=clout_message,
-                                      inline=False)
-
-                player_skills = [(player, player.skill.clout) for player in players_in_team]
-                best_player = max(player_skills, key=itemgetter(1))[0]
-                builder.add_field(name='    Best player in the team by clout:',
-                                  value=truncate(best_player.name.value, 500, "…") + ": " + best_player.skill.message,
-                                  inline=False)
-
-                builder.add_field(name='\tSources:',
-                                  value=truncate('_' + team_sources + '_', 1023, "…_"),
-                                  inline=False)
-
-                builder.add_field(name='\tSlapp Id:',
-                                  value=t.guid.__str__(),
-                                  inline=False)
+    if len(resolved_teams) > 1:
+        old_teams = truncate('Old teams: \n```' + join("\n", resolved_teams[1:]) + '```\n', 1000, "…\n```\n")
+    else:
+        old_teams = ''
+
+    if len(names) > 1:
+        other_names = truncate("_ᴬᴷᴬ_ ```" + '\n'.join(names[1:]) + "```\n", 1000, "…\n```\n")
+    else:
+        other_names = ''
+
+    battlefy = ''
+    for battlefy_profile in p.battlefy.slugs:
+        battlefy += f'{emojis.BATTLEFY} [{escape(battlefy_profile.value)}]' \
+                    f'({battlefy_profile.uri})\n'
+
+    discord = ''
+    for discord_profile in p.discord.ids:
+        did = escape(discord_profile.value)
+        discord += f'{emojis.DISCORD} [{did}]' \
+                   f'(https://discord.id/?prefill={did}) \n🦑 [Sendou](https://sendou.ink/u/{did})\n'
+
+    twitch = ''
+    for twitch_profile in p.twitch_profiles:
+        twitch += f'{emojis.TWITCH} [{escape(twitch_profile.value)}]' \
+                  f'({twitch_profile.uri})\n'
+
+    twitter = ''
+    for twitter_profile in p.twitter_profiles:
+        twitter += f'{emojis.TWITTER} [{escape(twitter_profile.value)}]' \
+                   f'({twitter_profile.uri})\n'
+
+    player_sources: List[str] = list(map(lambda s: attempt_link_source(s), _resolve_source_names(r, p.sources)))
+    top500 = (CROWN + " ") if p.top500 else ''
+    country_flag = p.country_flag + ' ' if p.country_flag else ''
+    notable_results = r.get_first_placements(p)
+
+    field_head = truncate(country_flag + top500 + code_wrap(current_name), 256) or ' '
+
+    if layout == LAYOUT_SINGLE:
+        field_body = f'{other_names}'
+        fields.append((field_head, truncate(field_body, 1023, "…") or "(Nothing else to say)", False))
+
+        if current_team or old_teams:
+            field_body = f'{current_team}{old_teams}'
+            fields.append(('    Teams:', truncate(field_body, 1023, "…") or "(Nothing else to say)", False))
+
+        if twitch or twitter or battlefy or discord:
+            field_body = f'{twitch}{twitter}{battlefy}{discord}'
+            fields.append(('    Socials:', truncate(field_body, 1023, "…") or "(Nothing else to say)", False))
+
+        if len(notable_results):
+            notable_results_str = ''
+            for win in notable_results:
+                notable_results_str += TROPHY + ' Won ' + win + '\n'
+
+            fields.append(('    Notable Wins:', truncate(notable_results_str, 1023, "…"), False))
+
+        if len(p.weapons):
+            fields.append(('    Weapons:', truncate(', '.join(p.weapons), 1023, "…"), False))
+
+        clout_message = p.skill.message
+        if p.skill.is_default:
+            clout_message += " (this is default.)"
+        fields.append(('    Clout:', clout_message, False))
+
+        if len(player_sources):
+            for source_batch in range(0, 15):
+                sources_count = len(player_sources)
+                value = ''
+                for j in range(0, min(sources_count, 6)):
+                    value += player_sources[j].__str__() + '\n'
+
+                fields.append(('    ' + f'Sources ({(source_batch + 1)}):', truncate(value, 1023, "…"), False))
+
+                player_sources = player_sources[min(sources_count, 7):]
+                if len(player_sources) <= 0:
+                    break
+
+    else:
+        if len(notable_results):
+            notable_results_str = ''
+            for win in notable_results:
+                notable_results_str += TROPHY + ' Won ' + win + '\n'
+        else:
+            notable_results_str = ''
+
+        additional_info = "\n `~full " + p.guid.__str__() + "`\n"
+
+        player_sources: str = "Sources:\n" + "\n".join(player_sources)
+        field_body = (f'{other_names}{current_team}{old_teams}'
+                      f'{twitch}{twitter}{battlefy}{discord}'
+                      f'{notable_results_str}{player_sources}') or "(Nothing else to say)"
+        if len(field_body) + len(additional_info) < 1024:
+            field_body += additional_info
+        else:
+            field_body = truncate(field_body, 1020 - len(additional_info), indicator="…")
+            if (field_body.count('```') % 2) == 1:  # If we have an unclosed ```
+                field_body += '```'
+            field_body += additional_info
+
+        fields.append((field_head, field_body, False))
+    return fields
+
+
+def _render_team(r: SlappResponseObject, t: Team, layout: str) -> List[RenderedField]:
+    """Render a matched team as embed fields."""
+    fields: List[RenderedField] = []
+    separator = ',\n' if layout == LAYOUT_SINGLE else ', '
+
+    players = r.matched_players_for_teams[t.guid]
+    players_in_team: List[Player] = []
+    player_strings = ''
+    for player_tuple in players:
+        if player_tuple:
+            p = player_tuple["Item1"]
+            in_team = player_tuple["Item2"]
+            name = code_wrap(p.name.value)
+
+            player_strings += \
+                f'{name} {("(Most recent)" if in_team else "(Ex)" if in_team is False else "")}'
+            player_strings += separator
+            if in_team:
+                players_in_team.append(p)
+
+    player_strings = player_strings[0:-len(separator)]
+    div_phrase = r.best_team_player_div_string(t)
+    if div_phrase:
+        div_phrase += '\n'
+    team_sources: str = "\n ".join([attempt_link_source(s) for s in _resolve_source_names(r, t.sources)])
+
+    if layout == LAYOUT_SINGLE:
+        info = f'{div_phrase}Players: {player_strings}'
+        fields.append((truncate(t.__str__(), 256, "") or "Unnamed Team", truncate(info, 1023, "…_"), False))
+
+        player_skills = [player.skill for player in players_in_team]
+        (min_clout, min_conf), (max_clout, max_conf) = Skill.team_clout(player_skills)
+
+        if min_conf > 1:  # 1%
+            if min_clout == max_clout:
+                clout_message = f"I rate the current team's clout at {min_clout} ({min_conf}% sure)"
             else:
-                additional_info = "\n `~full " + t.guid.__str__() + "`\n"
+                clout_message = f"I rate the current team's clout between {min_clout} ({min_conf}% sure) " \
+                                f"and {max_clout} ({max_conf}% sure)"
 
-                field_body = f'{div_phrase}Players: {player_strings}\n' \
-                             f'_{team_sources}_' or "(Nothing else to say)"
+            fields.append(('    Clout:', clout_message, False))
 
-                if len(field_body) + len(additional_info) < 1024:
-                    field_body += additional_info
-                else:
-                    field_body = truncate(field_body, 1020 - len(additional_info), indicator="…")
-                    if (field_body.count('```') % 2) == 1:  # If we have an unclosed ```
-                        field_body += '```'
-                    field_body += additional_info
+        player_skills = [(player, player.skill.clout) for player in players_in_team]
+        best_player = max(player_skills, key=itemgetter(1))[0]
+        fields.append(('    Best player in the team by clout:',
+                       truncate(best_player.name.value, 500, "…") + ": " + best_player.skill.message,
+                       False))
 
-                builder.add_field(name=truncate(t.__str__(), 256, "") or "Unnamed Team",
-                                  value=truncate(field_body, 1023, "…_"),
-                                  inline=False)
+        fields.append(('\tSources:', truncate('_' + team_sources + '_', 1023, "…_"), False))
 
-    builder.set_footer(
-        text=get_random_footer_phrase() + (
-            f'Only the first {MAX_RESULTS} results are shown for players and teams.' if r.show_limited else ''
-        ),
-        icon_url="https://media.discordapp.net/attachments/471361750986522647/758104388824072253/icon.png")
-    return builder, embed_colour
+        fields.append(('\tSlapp Id:', t.guid.__str__(), False))
+    else:
+        additional_info = "\n `~full " + t.guid.__str__() + "`\n"
+
+        field_body = f'{div_phrase}Players: {player_strings}\n' \
+                     f'_{team_sources}_' or "(Nothing else to say)"
+
+        if len(field_body) + len(additional_info) < 1024:
+            field_body += additional_info
+        else:
+            field_body = truncate(field_body, 1020 - len(additional_info), indicator="…")
+            if (field_body.count('```') % 2) == 1:  # If we have an unclosed ```
+                field_body += '```'
+            field_body += additional_info
+
+        fields.append((truncate(t.__str__(), 256, "") or "Unnamed Team", truncate(field_body, 1023, "…_"), False))
+    return fields
+
+
+def _add_compact_fields(builder: Embed, response: dict, player_dicts: List[dict], team_dicts: List[dict]):
+    """
+    Add the matched players and teams to the builder as one line each, packed into as few fields as possible.
+    Only the shown entities are parsed, from the raw response, rather than the whole response.
+    """
+    if player_dicts:
+        # Keys are lower-cased to match str(UUID).
+        team_dicts_by_id: Dict[str, dict] = {team_id.lower(): team_dict for team_id, team_dict
+                                             in (response.get("AdditionalTeams") or {}).items()}
+        for team_dict in team_dicts:
+            team_dicts_by_id[team_dict["Id"].lower()] = team_dict
+
+        lines = [_cached_render(UUID(player_dict["Id"]), LAYOUT_COMPACT,
+                                lambda: _render_compact_player(player_dict, team_dicts_by_id))
+                 for player_dict in player_dicts[0:COMPACT_MAX_RESULTS]]
+        _add_line_fields(builder, 'Players', lines)
+
+    if team_dicts:
+        players_for_teams: Dict[str, List[dict]] = response.get("PlayersForTeams") or {}
+        lines = [_cached_render(UUID(team_dict["Id"]), LAYOUT_COMPACT,
+                                lambda: _render_compact_team(team_dict, players_for_teams.get(team_dict["Id"], [])))
+                 for team_dict in team_dicts[0:COMPACT_MAX_RESULTS]]
+        _add_line_fields(builder, 'Teams', lines)
+
+
+def _add_line_fields(builder: Embed, title: str, lines: List[str]):
+    """Add the lines to the builder, in as many fields titled "title (n)" as are needed to stay in the field limit."""
+    value = ''
+    field_number = 1
+    for line in lines:
+        if value and len(value) + len(line) + 1 > 1023:
+            builder.add_field(name=f'{title} ({field_number}):', value=value, inline=False)
+            value = ''
+            field_number += 1
+        value += line + '\n'
+
+    if value:
+        builder.add_field(name=f'{title} ({field_number}):', value=value, inline=False)
+
+
+def _render_compact_player(player_dict: dict, team_dicts_by_id: Dict[str, dict]) -> str:
+    """Render a matched player as a line of its name, clout, and current team."""
+    from core_classes.builtins import NoTeam
+    p = Player.from_dict(player_dict)
+
+    current_team = ''
+    if p.teams:
+        if p.teams[0] == NoTeam.guid:
+            current_team = NoTeam.__str__()
+        else:
+            team_dict = team_dicts_by_id.get(p.teams[0].__str__())
+            if team_dict:
+                current_team = Team.from_dict(team_dict).__str__()
+
+    top500 = (CROWN + " ") if p.top500 else ''
+    country_flag = p.country_flag + ' ' if p.country_flag else ''
+    clout = 'No clout yet' if p.skill.is_default else f'Clout {p.skill.clout} ({p.skill.confidence}%)'
+    team = f' · {truncate(current_team, 64, "…")}' if current_team else ''
+    return truncate(f'{country_flag}{top500}{code_wrap(escape(p.name.value))} · {clout}{team}', 256, "…")
+
+
+def _render_compact_team(team_dict: dict, player_tuples: List[dict]) -> str:
+    """Render a matched team as a line of its name, clout, and number of current players."""
+    t = Team.from_dict(team_dict)
+
+    # As in SlappResponseObject, Item2 is present if the player is in the team.
+    players_in_team = [Player.from_dict(tup["Item1"]) for tup in player_tuples if "Item1" in tup and "Item2" in tup]
+    if players_in_team:
+        (_, _), (max_clout, max_conf) = Skill.team_clout([player.skill for player in players_in_team])
+        clout = f'Clout {max_clout} ({max_conf}%) · {len(players_in_team)} current players'
+    else:
+        clout = 'No current players'
+    return truncate(f'{code_wrap(escape(truncate(t.__str__(), 100, "…")))} · {clout}', 256, "…")
@@ -1,57 +1,90 @@
-from typing import Dict, Union, List
+from collections import namedtuple
+from typing import Dict, Union, List, Optional
 from uuid import UUID
 
 from core_classes.bracket import Bracket
+from core_classes.division import Division
 from core_classes.player import Player
 from core_classes.skill import Skill
+from core_classes.source import UNKNOWN_SOURCE
 from core_classes.team import Team
 from helpers.dict_helper import from_list
+from helpers.str_helper import ordinal
 from slapp_py.strings import attempt_link_source
 
+PlacementFinish = namedtuple('PlacementFinish', ('bracket', 'source_id', 'rank'))
+"""A player's finish in a bracket: the Bracket, the id of the Source it belongs to, and the rank achieved."""
+
 
 class SlappResponseObject:
     def __init__(self, response: dict):
         matched_players: List[Player] = from_list(lambda x: Player.from_dict(x), response.get("Players"))
         matched_teams: List[Team] = from_list(lambda x: Team.from_dict(x), response.get("Teams"))
-        known_teams: Dict[str, Team] = {}
-        placements_for_players: Dict[str, Dict[str, List[Bracket]]] = {}
+        known_teams: Dict[UUID, Team] = {}
+        placements_for_players: Dict[UUID, Dict[UUID, List[Bracket]]] = {}
         """Dictionary keyed by Player id, of value Dictionary keyed by Source id of value Placements list"""
 
         for team_id in response.get("AdditionalTeams"):
-            known_teams[team_id.__str__()] = Team.from_dict(response.get("AdditionalTeams")[team_id])
+            known_teams[UUID(team_id)] = Team.from_dict(response.get("AdditionalTeams")[team_id])
         for team in matched_teams:
-            known_teams[team.guid.__str__()] = team
+            known_teams[team.guid] = team
 
-        matched_players_for_teams: Dict[str, List[Dict[str, Union[Player, bool]]]] = {}
+        matched_players_for_teams: Dict[UUID, List[Dict[str, Union[Player, bool]]]] = {}
         for team_id in response.get("PlayersForTeams"):
-            matched_players_for_teams[team_id] = []
+            players_for_team: List[Dict[str, Union[Player, bool]]] = []
             for tup in response.get("PlayersForTeams")[team_id]:
                 player_tuple_for_team: Dict[str, Union[Player, bool]] = \
                     {"Item1": Player.from_dict(tup["Item1"]) if "Item1" in tup else None,
                      "Item2": "Item2" in tup}
-                matched_players_for_teams[team_id].append(player_tuple_for_team)
+                players_for_team.append(player_tuple_for_team)
+            matched_players_for_teams[UUID(team_id)] = players_for_team
 
-        sources: Dict[str, str] = {}
+        sources: Dict[UUID, str] = {}
 
         for source_id in response.get("Sources"):
             source_name = response.get("Sources")[source_id]
-            sources[source_id] = source_name
+            sources[UUID(source_id)] = source_name
 
         for player_id in response.get("PlacementsForPlayers"):
-            placements_for_players[player_id.__str__()] = {}
+            placements_for_sources: Dict[UUID, List[Bracket]] = {}
             for source_id in response.get("PlacementsForPlayers")[player_id]:
-                placements_for_players[player_id][source_id] = []
-                for bracket in response.get("PlacementsForPlayers")[player_id][source_id]:
-                    placements_for_players[player_id][source_id].append(Bracket.from_dict(bracket))
+                placements_for_sources[UUID(source_id)] = \
+                    [Bracket.from_dict(bracket) for bracket in response.get("PlacementsForPlayers")[player_id][source_id]]
+            placements_for_players[UUID(player_id)] = placements_for_sources
+
+        placements_index: Dict[UUID, List[PlacementFinish]] = {}
+        for player_id in placements_for_players:
+            finishes: List[PlacementFinish] = []
+            for source_id in placements_for_players[player_id]:
+                for bracket in placements_for_players[player_id][source_id]:
+                    for rank, ranked_ids in bracket.placements.players_by_placement.items():
+                        if player_id in ranked_ids:
+                            finishes.append(PlacementFinish(bracket, source_id, rank))
+            placements_index[player_id] = finishes
+
+        # Use the placements precomputed into the snapshot for players that the response didn't send brackets for.
+        for player in matched_players:
+            if player.top_placements and player.guid not in placements_index:
+                placements_index[player.guid] = [PlacementFinish(Bracket(placement.bracket_name),
+                                                                 placement.source,
+                                                                 placement.rank)
+                                                 for placement in player.top_placements]
 
         self.matched_players = matched_players
         self.matched_teams = matched_teams
         self.known_teams = known_teams
         self.placements_for_players = placements_for_players
+        self.placements_index = placements_index
+        """Placements keyed by Player id, values are the player's finishes in the order they were received.
+        Where only the player's precomputed top placements are known, those are used instead.
+        TopPlacements is optional in a player's dict, so a player with neither has no finishes."""
         self.matched_players_for_teams = matched_players_for_teams
+        """Players keyed by Team id, values are the Item1 (Player) and Item2 (is in team) dictionaries"""
         self.sources = sources
         """Sources keyed by id, values are its name"""
         self.query = response.get("Query", "<UNKNOWN_QUERY_PLEASE_DEBUG>")
+        self._division_ranking: Optional[Dict[UUID, int]] = None
+        self._ranked_teams: List[Team] = []
 
     @property
     def matched_players_len(self):
@@ -73,10 +106,43 @@ class SlappResponseObject:
     def show_limited(self):
         return self.matched_players_len > 9 or self.matched_teams_len > 9
 
+    @property
+    def division_ranking(self) -> Dict[UUID, int]:
+        """
+        The known teams with a known division ranked by their current division, keyed by team id.
+        Rank 0 is the highest division. Built once on first use.
+        """
+        if self._division_ranking is None:
+            self._ranked_teams = sorted((team for team in self.known_teams.values()
+                                         if not team.current_div.is_unknown),
+                                        key=lambda team: team.current_div.normalised_value)
+            self._division_ranking = {team.guid: rank for rank, team in enumerate(self._ranked_teams)}
+        return self._division_ranking
+
+    def best_division_for_player(self, p: Player) -> Optional[Division]:
+        """Return the highest known division of the teams the player has played for, or None if none are known."""
+        ranking = self.division_ranking
+        best_rank: Optional[int] = None
+        for team_id in p.teams:
+            rank = ranking.get(team_id)
+            if rank is not None and (best_rank is None or rank < best_rank):
+                best_rank = rank
+        return self._ranked_teams[best_rank].current_div if best_rank is not None else None
+
+    def best_team_player_div_string(self, team: Team) -> str:
+        """Describe the highest division that a current player of the team has played at, compared to the team's."""
+        return Team.best_team_player_div_string(team,
+                                                self.matched_players_for_teams.get(team.guid, []),
+                                                self.known_teams,
+                                                self.best_division_for_player)
+
     def get_players_in_team(self, team_guid: Union[UUID, str], include_ex_players: bool = True) -> List[Player]:
         """Return Player objects for the specified team id, optionally excluding players no longer in the team."""
 
-        return [player_dict["Item1"] for player_dict in self.matched_players_for_teams.get(team_guid.__str__(), [])
+        if not isinstance(team_guid, UUID):
+            team_guid = UUID(team_guid)
+
+        return [player_dict["Item1"] for player_dict in self.matched_players_for_teams.get(team_guid, [])
                 if player_dict and player_dict.get("Item1") and (player_dict["Item2"] or include_ex_players)]
 
     def get_team_skills(self, team_guid: Union[UUID, str], include_ex_players: bool = True) -> Dict[Player, Skill]:
@@ -87,16 +153,26 @@ class SlappResponseObject:
         players = self.get_players_in_team(team_guid, include_ex_players)
         return {player: player.skill for player in players}
 
+    def get_placements(self, p: Player, max_rank: Optional[int] = None) -> List[PlacementFinish]:
+        """Return the player's bracket finishes, optionally only those at max_rank or better."""
+        finishes = self.placements_index.get(p.guid, [])
+        if max_rank is None:
+            return list(finishes)
+        return [finish for finish in finishes if finish.rank <= max_rank]
+
     def get_first_placements(self, p: Player) -> List[str]:
-        result = []
-        if p.guid.__str__() in self.placements_for_players:
-            sources = self.placements_for_players[p.guid.__str__()]
-            for source_id in sources:
-                brackets = self.placements_for_players[p.guid.__str__()][source_id]
-                for bracket in brackets:
-                    if 1 in bracket.placements.players_by_placement:
-                        first_place_ids = [player_id.__str__() for player_id in bracket.placements.players_by_placement[1]]
-                        if p.guid.__str__() in first_place_ids:
-                            result.append(bracket.name + ' in ' + attempt_link_source(self.sources[source_id]))
-
-        return result
+        """Return descriptions of the brackets that the player has won."""
+        return [finish.bracket.name + ' in ' + attempt_link_source(self.sources.get(finish.source_id, UNKNOWN_SOURCE))
+                for finish in self.get_placements(p, 1)]
+
+    def get_top_placements(self, p: Player, max_rank: int) -> List[str]:
+        """Return descriptions of the player's finishes at max_rank or better, e.g. top 3 or top 8."""
+        return [ordinal(finish.rank) + ' in ' + finish.bracket.name + ' in ' +
+                attempt_link_source(self.sources.get(finish.source_id, UNKNOWN_SOURCE))
+                for finish in self.get_placements(p, max_rank)]
+
+    def get_top_3_placements(self, p: Player) -> List[str]:
+        return self.get_top_placements(p, 3)
+
+    def get_top_8_placements(self, p: Player) -> List[str]:
+        return self.get_top_placements(p, 8)
@@ -1,6 +1,8 @@
-import re
-from typing import List, Dict, Union, Optional
+from functools import lru_cache
+from typing import Union, Optional
 
+from core_classes.source_metadata import parse_source_name
+from helpers.markdown_helper import escape
 from helpers.str_helper import truncate
 
 
@@ -13,59 +15,34 @@ def escape_characters(string: Union[str, dict], characters: str = '\\', escape_c
     :return: The escaped string
     """
     if isinstance(string, dict):
-        for element in string:
-            for char in characters:
-                element = element.replace(char, escape_character + char)
-    else:
-        if not isinstance(string, str):
-            string = string.__str__()
+        return string
 
-        for char in characters:
-            string = string.replace(char, escape_character + char)
-    return string
+    if not isinstance(string, str):
+        string = string.__str__()
+    return escape(string, characters, escape_character)
 
 
 def truncate_source(source: str, max_length: int = 128) -> str:
     # Strip the source id
-    source = re.sub("-+[0-9a-fA-F]+$", '', source)
-    source = escape_characters(source)
+    source = parse_source_name(source).title
+    source = escape(source)
 
     # Truncate
     source = truncate(source, max_length, '…')
     return source
 
 
+@lru_cache(maxsize=8192)
 def attempt_link_source(source_name: Optional[str]) -> str:
-    """Take a source and attempt to convert it into a link"""
+    """Take a source and attempt to convert it into a link. Results are memoised by source name."""
 
     if not source_name:
         return source_name
 
-    # Mapping takes a list of tournament names and gives an organisation name
-    mapping: Dict[str, List[str]] = {
-        'inkling-performance-labs': ['-low-ink-', '-testing-grounds-' '-swim-or-sink-'],
-        'inktv': ['-bns-', '-swl-winter-snowflake-', '-splatoon-world-league-',
-                  '-inktv-open-', '-extrafaganza-', '-inkvitational-'],
-        'sitback-saturdays': ['-sitback-saturdays-'],
-        'splatoon2': ['-splatoon-2-north-american-online-open-'],
-        'squidboards-splatoon-2-community-events': ['-sqss-', '-squidboards-splat-series-'],
-        'squid-spawning-grounds': ['-squid-spawning-grounds-'],
-        'fresh-start-cup': ['-fresh-start-cup-'],
-        'swift-second-saturdays': ['-sss-'],
-        'gamesetmatch': ['-gsm-'],
-        'area-cup': ['-area-cup-'],
-        'asquidmin': ['-turtlement-'],
-    }
+    metadata = parse_source_name(source_name)
+    text = truncate(escape(metadata.title), 128, '…')
 
-    for organiser in mapping:
-        for tourneys in mapping[organiser]:
-            for tournament_name in tourneys:
-                if tournament_name in source_name:
-                    m = re.search("-+([0-9a-fA-F]+)$", source_name, re.I)
-                    text = truncate_source(source_name)
-                    if m:
-                        guid = m.groups()[0]
-                        return f'[{text}](https://battlefy.com/{organiser}//{guid}/info)'
-                    else:
-                        return text
-    return truncate_source(source_name)
+    if metadata.organiser and metadata.battlefy_id:
+        return f'[{text}](https://battlefy.com/{metadata.organiser}//{metadata.battlefy_id}/info)'
+    else:
+        return text
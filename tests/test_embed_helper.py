@@ -0,0 +1,136 @@
+import copy
+import random
+import unittest
+from typing import List
+
+from discord import Embed
+
+from PyBot.helpers.embed_helper import paginate_embed, EMBED_MAX_CHARACTERS, EMBED_MAX_FIELDS, MAX_PAGES, \
+    PAGE_MAX_FIELDS
+
+
+def reference_pages(builder: Embed) -> List[dict]:
+    """
+    The pages that send_slapp sent before paginate_embed, by removing fields from the end of the embed
+    and re-measuring it until it fits. Kept as the reference that paginate_embed must match.
+    """
+    sent: List[dict] = []
+    colour = builder.colour
+    removed_fields: List[dict] = []
+    message = 1
+    # Only send 10 messages tops
+    while message <= 10:
+        # While the message is more than the allowed 6000, or
+        # The message has more than 20 fields, or
+        # The removed fields has one only (the footer cannot be alone)
+        while builder.__len__() > 6000 or len(builder.fields) > 20 or len(removed_fields) == 1:
+            index = len(builder.fields) - 1
+            removed: dict = builder._fields[index]
+            builder.remove_field(index)
+            removed_fields.append(removed)
+
+        if builder:
+            # to_dict shares the embed's fields list, which is modified as fields are removed.
+            sent.append(copy.deepcopy(builder.to_dict()))
+
+        if len(removed_fields):
+            message += 1
+            removed_fields.reverse()
+            builder = Embed(title=f'Page {message}', colour=colour, description='')
+            for field in removed_fields:
+                try:
+                    builder._fields.append(field)
+                except AttributeError:
+                    builder._fields = [field]
+            removed_fields.clear()
+        else:
+            break
+    return sent
+
+
+def make_embed(field_sizes: List[int], title: str = 'Results', description: str = 'Some results') -> Embed:
+    builder = Embed(title=title, colour=0x00FF00, description=description)
+    builder.set_footer(text='A footer')
+    for i, size in enumerate(field_sizes):
+        name = f'Field {i}'
+        builder.add_field(name=name, value='x' * max(1, size - len(name)), inline=False)
+    return builder
+
+
+def deep_copy(builder: Embed) -> Embed:
+    # Embed.copy shares the fields list, which the reference modifies.
+    return Embed.from_dict(copy.deepcopy(builder.to_dict()))
+
+
+class TestPaginateEmbed(unittest.TestCase):
+    def assert_matches_reference(self, builder: Embed):
+        expected = reference_pages(deep_copy(builder))
+        before = copy.deepcopy(builder.to_dict())
+        actual = [page.to_dict() for page in paginate_embed(builder)]
+        self.assertEqual(expected, actual)
+        self.assertEqual(before, builder.to_dict(), 'paginate_embed must not modify the embed')
+
+    def test_no_fields(self):
+        self.assert_matches_reference(make_embed([]))
+
+    def test_field_limit(self):
+        for count in (1, 2, 19, 20, 21, 22, 25, 26, 40, 41, 59, 60, 61):
+            with self.subTest(count=count):
+                builder = make_embed([20] * count)
+                self.assert_matches_reference(builder)
+                for page in paginate_embed(builder):
+                    self.assertLessEqual(len(page.fields), PAGE_MAX_FIELDS)
+                    self.assertLessEqual(len(page.fields), EMBED_MAX_FIELDS)
+
+        with self.assertRaises(AssertionError):
+            paginate_embed(make_embed([20]), max_fields=EMBED_MAX_FIELDS + 1)
+
+    def test_character_limit(self):
+        for field_size in (300, 999, 1000, 1024, 1200):
+            for count in (5, 6, 7, 12, 13, 30):
+                with self.subTest(field_size=field_size, count=count):
+                    builder = make_embed([field_size] * count)
+                    self.assert_matches_reference(builder)
+                    for page in paginate_embed(builder):
+                        self.assertLessEqual(len(page), EMBED_MAX_CHARACTERS)
+
+    def test_randomised(self):
+        rng = random.Random(31)
+        for _ in range(200):
+            builder = make_embed([rng.randint(10, 1280) for _ in range(rng.randint(0, 120))],
+                                 description='d' * rng.randint(0, 2048))
+            self.assert_matches_reference(builder)
+
+    def test_max_pages(self):
+        builder = make_embed([20] * 300)
+        self.assert_matches_reference(builder)
+        pages = paginate_embed(builder)
+        self.assertEqual(MAX_PAGES, len(pages))
+        self.assertEqual(MAX_PAGES * PAGE_MAX_FIELDS, sum(len(page.fields) for page in pages))
+
+    def test_single_oversized_field(self):
+        # The reference raised when the only field could not fit, so send_slapp reported the error instead.
+        builder = make_embed([EMBED_MAX_CHARACTERS + 1])
+        with self.assertRaises(IndexError):
+            reference_pages(deep_copy(builder))
+
+        pages = paginate_embed(builder)
+        self.assertEqual(1, len(pages))
+        self.assertEqual([], pages[0].fields)
+        self.assertEqual(builder.title, pages[0].title)
+
+    def test_oversized_field_after_others(self):
+        # The reference sent empty "Page n" embeds up to the page limit once it reached a field that could not fit.
+        # paginate_embed sends the same pages up to that field and stops.
+        for field_sizes in ([100, 100, 100, EMBED_MAX_CHARACTERS + 1],
+                            [100, EMBED_MAX_CHARACTERS + 1, 100],
+                            [100] * 30 + [EMBED_MAX_CHARACTERS + 1] + [100] * 5):
+            with self.subTest(field_sizes=field_sizes):
+                builder = make_embed(field_sizes)
+                expected = [page for i, page in enumerate(reference_pages(deep_copy(builder)))
+                            if i == 0 or page.get('fields')]
+                self.assertEqual(expected, [page.to_dict() for page in paginate_embed(builder)])
+
+
+if __name__ == '__main__':
+    unittest.main()
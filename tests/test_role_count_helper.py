@@ -0,0 +1,175 @@
+import asyncio
+import unittest
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from PyBot.helpers.role_count_helper import RoleCounter
+
+GUILD_ID = 1
+EVERYONE = GUILD_ID
+RED = 10
+BLUE = 11
+
+
+class FakeRole:
+    def __init__(self, role_id: int):
+        self.id = role_id
+
+    def is_default(self) -> bool:
+        return self.id == EVERYONE
+
+
+class FakeMember:
+    def __init__(self, member_id: int, role_ids: List[int]):
+        self.id = member_id
+        self.roles = [FakeRole(EVERYONE)] + [FakeRole(role_id) for role_id in role_ids]
+
+
+class FakeGuild:
+    """A guild whose fetch_members pages through its members as they are when each page is fetched."""
+
+    def __init__(self, members: Dict[int, List[int]], page_size: int = 2):
+        self.id = GUILD_ID
+        self.members = members
+        self.page_size = page_size
+        self.on_page: Optional[Callable[[int], None]] = None
+        """Called with each page number after it's fetched, as the gateway events would arrive between pages."""
+
+    async def fetch_members(self, limit=None):
+        after = 0
+        page = 0
+        while True:
+            await asyncio.sleep(0)
+            ids = sorted(member_id for member_id in self.members if member_id > after)[:self.page_size]
+            fetched = [FakeMember(member_id, self.members[member_id]) for member_id in ids]
+            if self.on_page:
+                self.on_page(page)
+            for member in fetched:
+                yield member
+            if len(ids) < self.page_size:
+                return
+            after = ids[-1]
+            page += 1
+
+    def recount(self) -> Counter:
+        return Counter(role_id for role_ids in self.members.values() for role_id in role_ids)
+
+
+def member_event(event: str, member_id: int, role_ids: Optional[List[int]] = None) -> dict:
+    data = {'guild_id': str(GUILD_ID), 'user': {'id': str(member_id)}}
+    if role_ids is not None:
+        data['roles'] = [str(role_id) for role_id in role_ids]
+    return {'t': event, 'd': data}
+
+
+class TestRoleCounter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.guild = FakeGuild({1: [RED], 2: [RED, BLUE], 3: [BLUE], 4: [], 5: [RED], 6: [RED, BLUE]})
+        self.counter = RoleCounter()
+
+    def send(self, event: str, member_id: int, role_ids: Optional[List[int]] = None):
+        """Change the fake guild and send the gateway event for the change."""
+        if event == 'GUILD_MEMBER_REMOVE':
+            del self.guild.members[member_id]
+        else:
+            self.guild.members[member_id] = role_ids
+        self.counter.on_socket_response(member_event(event, member_id, role_ids))
+
+    async def assert_counts_match(self):
+        # Load the guild first, as events can change it while it loads.
+        await self.counter.count(self.guild, RED)
+        expected = self.guild.recount()
+        for role_id in (RED, BLUE):
+            self.assertEqual(expected[role_id], await self.counter.count(self.guild, role_id), f'{role_id=}')
+
+    async def test_load(self):
+        await self.assert_counts_match()
+
+    async def test_events_after_load(self):
+        await self.counter.count(self.guild, RED)
+        self.send('GUILD_MEMBER_ADD', 7, [BLUE])
+        self.send('GUILD_MEMBER_UPDATE', 1, [BLUE])
+        self.send('GUILD_MEMBER_REMOVE', 2)
+        await self.assert_counts_match()
+
+    async def test_member_leaves_mid_load(self):
+        # Member 1 was on the first page, so the loaded members still have them when they leave.
+        self.guild.on_page = lambda page: page == 1 and self.send('GUILD_MEMBER_REMOVE', 1)
+        await self.assert_counts_match()
+
+    async def test_member_changes_roles_mid_load(self):
+        def on_page(page: int):
+            if page == 0:
+                # Member 5's page hasn't been fetched yet, so it will have their new roles too.
+                self.send('GUILD_MEMBER_UPDATE', 5, [BLUE])
+            elif page == 1:
+                self.send('GUILD_MEMBER_UPDATE', 2, [])
+                self.send('GUILD_MEMBER_ADD', 8, [RED])
+                self.send('GUILD_MEMBER_UPDATE', 8, [RED, BLUE])
+
+        self.guild.on_page = on_page
+        await self.assert_counts_match()
+
+    async def test_role_deleted_mid_load(self):
+        def on_page(page: int):
+            if page == 1:
+                for member_id, role_ids in self.guild.members.items():
+                    self.guild.members[member_id] = [role_id for role_id in role_ids if role_id != BLUE]
+                self.counter.on_socket_response({'t': 'GUILD_ROLE_DELETE',
+                                                 'd': {'guild_id': str(GUILD_ID), 'role_id': str(BLUE)}})
+
+        self.guild.on_page = on_page
+        await self.assert_counts_match()
+
+    async def test_guild_deleted_mid_load(self):
+        self.guild.on_page = lambda page: page == 1 and self.counter.on_socket_response(
+            {'t': 'GUILD_DELETE', 'd': {'id': str(GUILD_ID)}})
+        self.assertEqual(0, await self.counter.count(self.guild, RED))
+
+        # The guild is loaded again the next time that it's needed.
+        self.guild.on_page = None
+        await self.assert_counts_match()
+
+    def assert_role_sets(self, expected: List[List[int]]):
+        self.assertEqual({frozenset(role_ids) for role_ids in expected}, set(self.counter._role_sets))
+        self.assertEqual(set(self.counter._role_sets), set(self.counter._role_set_refs))
+
+    async def test_role_sets_are_shared(self):
+        await self.counter.count(self.guild, RED)
+        members = self.counter._member_roles[GUILD_ID]
+        self.assertIs(members[2], members[6])
+        self.assert_role_sets([[RED], [RED, BLUE], [BLUE], []])
+
+    async def test_role_sets_pruned_when_members_leave(self):
+        await self.counter.count(self.guild, RED)
+        self.send('GUILD_MEMBER_REMOVE', 3)
+        self.send('GUILD_MEMBER_REMOVE', 4)
+        self.send('GUILD_MEMBER_REMOVE', 2)
+        self.assert_role_sets([[RED], [RED, BLUE]])
+
+        # Member 6 had the last {RED, BLUE}, and member 1 keeps {RED}.
+        self.send('GUILD_MEMBER_UPDATE', 6, [RED])
+        self.send('GUILD_MEMBER_UPDATE', 1, [RED])
+        self.assert_role_sets([[RED]])
+        await self.assert_counts_match()
+
+    async def test_role_sets_pruned_when_role_deleted(self):
+        await self.counter.count(self.guild, RED)
+        self.counter.on_socket_response({'t': 'GUILD_ROLE_DELETE',
+                                         'd': {'guild_id': str(GUILD_ID), 'role_id': str(BLUE)}})
+        self.assert_role_sets([[RED], []])
+
+    async def test_role_sets_pruned_when_guild_deleted(self):
+        await self.counter.count(self.guild, RED)
+        self.counter.on_socket_response({'t': 'GUILD_DELETE', 'd': {'id': str(GUILD_ID)}})
+        self.assert_role_sets([])
+
+    async def test_role_sets_pruned_when_guild_deleted_mid_load(self):
+        self.guild.on_page = lambda page: page == 1 and self.counter.on_socket_response(
+            {'t': 'GUILD_DELETE', 'd': {'id': str(GUILD_ID)}})
+        await self.counter.count(self.guild, RED)
+        self.assert_role_sets([])
+
+
+if __name__ == '__main__':
+    unittest.main()
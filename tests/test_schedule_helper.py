@@ -0,0 +1,88 @@
+import asyncio
+import unittest
+from typing import List
+
+from PyBot.helpers.schedule_helper import FairDispatcher
+
+
+class TestFairDispatcher(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.sent: List[str] = []
+        self.expired: List[str] = []
+
+    def make_dispatcher(self, timeout_seconds=None) -> FairDispatcher:
+        def dispatch(request: str) -> bool:
+            self.sent.append(request)
+            return True
+
+        return FairDispatcher(dispatch, max_in_flight=2, timeout_seconds=timeout_seconds,
+                              on_timeout=self.expired.append)
+
+    def test_takes_turns_between_keys(self):
+        dispatcher = self.make_dispatcher()
+        for request in ('a1', 'a2', 'a3', 'a4'):
+            dispatcher.submit('a', request)
+        dispatcher.submit('b', 'b1')
+        self.assertEqual(['a1', 'a2'], self.sent)
+
+        dispatcher.done('a1')
+        dispatcher.done('a2')
+        self.assertEqual(['a1', 'a2', 'a3', 'b1'], self.sent)
+
+    def test_done_is_idempotent(self):
+        dispatcher = self.make_dispatcher()
+        for request in ('r1', 'r2', 'r3', 'r4'):
+            dispatcher.submit('a', request)
+
+        dispatcher.done('r1')
+        dispatcher.done('r1')
+        dispatcher.done('r4')  # Not dispatched yet.
+        self.assertEqual(['r1', 'r2', 'r3'], self.sent)
+        self.assertEqual(2, dispatcher.in_flight)
+
+    async def test_dropped_reply_times_out(self):
+        dispatcher = self.make_dispatcher(timeout_seconds=0.1)
+        for request in ('r1', 'r2', 'r3', 'r4', 'r5'):
+            dispatcher.submit('a', request)
+
+        # r1's reply is dropped, and the others are answered.
+        dispatcher.done('r2')
+        self.assertEqual(['r1', 'r2', 'r3'], self.sent)
+        dispatcher.done('r3')
+        self.assertEqual(['r1', 'r2', 'r3', 'r4'], self.sent)
+
+        # r1 and r4 never answer, which would leave the dispatcher at its cap without the deadline.
+        # r5 is dispatched when r1 times out, so it's still in flight.
+        await asyncio.sleep(0.15)
+        self.assertEqual(['r1', 'r4'], self.expired)
+        self.assertEqual(['r1', 'r2', 'r3', 'r4', 'r5'], self.sent)
+        self.assertEqual(2, dispatcher.timed_out)
+
+        # A late response for a request that timed out doesn't free another slot.
+        dispatcher.done('r1')
+        self.assertEqual(1, dispatcher.in_flight)
+
+    async def test_released_request_still_times_out(self):
+        dispatcher = self.make_dispatcher(timeout_seconds=0.05)
+        for request in ('r1', 'r2', 'r3'):
+            dispatcher.submit('a', request)
+
+        # Nothing waits for r1's response anymore, so its slot is freed, but its response could still come back.
+        dispatcher.release('r1')
+        self.assertEqual(['r1', 'r2', 'r3'], self.sent)
+        dispatcher.done('r2')
+        dispatcher.done('r3')
+        await asyncio.sleep(0.1)
+        self.assertEqual(['r1'], self.expired)
+        self.assertEqual(0, dispatcher.in_flight)
+
+    async def test_answered_request_does_not_time_out(self):
+        dispatcher = self.make_dispatcher(timeout_seconds=0.01)
+        dispatcher.submit('a', 'r1')
+        dispatcher.done('r1')
+        await asyncio.sleep(0.05)
+        self.assertEqual([], self.expired)
+
+
+if __name__ == '__main__':
+    unittest.main()
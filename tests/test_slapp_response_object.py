@@ -0,0 +1,75 @@
+import unittest
+from typing import List, Optional
+
+from core_classes.player import Player
+from slapp_py.slapp_response_object import SlappResponseObject
+
+PLAYER_ID = '6c2a3b6e-1d1a-4c1c-9f7a-1d2e3f4a5b6c'
+SOURCE_ID = '0b8e7f6a-5d4c-4b3a-8f2e-1d0c9b8a7f6e'
+OTHER_SOURCE_ID = '9a8b7c6d-5e4f-4a3b-9c2d-1e0f9a8b7c6d'
+SOURCES = {SOURCE_ID: '2021-03-06-low-ink-1-5f9f3b1e2a4c6d8e0f1a2b3c',
+           OTHER_SOURCE_ID: '2021-04-10-swim-or-sink-2-6a0b4c2d3e5f7a9b1c2d3e4f'}
+
+TOP_PLACEMENTS = [{"S": SOURCE_ID, "B": "Top Cut", "R": 1},
+                  {"S": OTHER_SOURCE_ID, "B": "Alpha", "R": 3},
+                  {"S": OTHER_SOURCE_ID, "B": "Swiss", "R": 5}]
+"""The precomputed finishes, as misc/placements_to_players stores them in the Players snapshot."""
+
+BRACKETS = {SOURCE_ID: [{"Name": "Top Cut", "Placements": {"PlayersByPlacement": {"1": [PLAYER_ID]}}}],
+            OTHER_SOURCE_ID: [{"Name": "Alpha", "Placements": {"PlayersByPlacement": {"3": [PLAYER_ID]}}},
+                              {"Name": "Swiss", "Placements": {"PlayersByPlacement": {"5": [PLAYER_ID]}}}]}
+"""The same finishes, as Slapp sends them in the PlacementsForPlayers brackets."""
+
+
+def make_response(top_placements: Optional[List[dict]] = None, brackets: Optional[dict] = None) -> dict:
+    player = {"Id": PLAYER_ID, "Names": [{"Value": "Player"}], "Skill": {"μ": 25, "σ": 8.3}}
+    if top_placements is not None:
+        player["TopPlacements"] = top_placements
+    return {
+        "Players": [player],
+        "Teams": [],
+        "AdditionalTeams": {},
+        "PlayersForTeams": {},
+        "Sources": SOURCES,
+        "PlacementsForPlayers": {PLAYER_ID: brackets} if brackets is not None else {},
+    }
+
+
+class TestTopPlacementsFallback(unittest.TestCase):
+    def test_top_placements_without_brackets(self):
+        r = SlappResponseObject(make_response(top_placements=TOP_PLACEMENTS))
+        p = r.matched_players[0]
+        self.assertEqual([(1, 'Top Cut'), (3, 'Alpha'), (5, 'Swiss')],
+                         [(finish.rank, finish.bracket.name) for finish in r.get_placements(p)])
+        self.assertEqual(1, len(r.get_first_placements(p)))
+        self.assertTrue(r.get_first_placements(p)[0].startswith('Top Cut in '))
+        self.assertEqual(2, len(r.get_top_3_placements(p)))
+        self.assertEqual(3, len(r.get_top_8_placements(p)))
+
+    def test_renders_the_same_as_brackets(self):
+        from_top_placements = SlappResponseObject(make_response(top_placements=TOP_PLACEMENTS))
+        from_brackets = SlappResponseObject(make_response(brackets=BRACKETS))
+        for method in ('get_first_placements', 'get_top_3_placements', 'get_top_8_placements'):
+            with self.subTest(method=method):
+                self.assertEqual(getattr(from_brackets, method)(from_brackets.matched_players[0]),
+                                 getattr(from_top_placements, method)(from_top_placements.matched_players[0]))
+
+    def test_brackets_take_precedence(self):
+        brackets = {SOURCE_ID: [{"Name": "Beta", "Placements": {"PlayersByPlacement": {"2": [PLAYER_ID]}}}]}
+        r = SlappResponseObject(make_response(top_placements=TOP_PLACEMENTS, brackets=brackets))
+        self.assertEqual([(2, 'Beta')],
+                         [(finish.rank, finish.bracket.name) for finish in r.get_placements(r.matched_players[0])])
+
+    def test_top_placements_are_optional(self):
+        r = SlappResponseObject(make_response())
+        self.assertEqual([], r.get_placements(r.matched_players[0]))
+        self.assertEqual([], r.get_top_8_placements(r.matched_players[0]))
+
+    def test_player_round_trip(self):
+        player = Player.from_dict(make_response(top_placements=TOP_PLACEMENTS)["Players"][0])
+        self.assertEqual(TOP_PLACEMENTS, player.to_dict()["TopPlacements"])
+        self.assertNotIn("TopPlacements", Player.from_dict(make_response()["Players"][0]).to_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()